@@ -1,12 +1,18 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
 import os
 import datetime
 from app.routes import tenders, documents, reminders
 from dotenv import load_dotenv
-from app.services.mongodb import connect_to_mongo, close_mongo_connection, ping_mongo, _get_database_name
+from app.services.mongodb import connect_to_mongo, close_mongo_connection, _get_database_name
+from app.services import mongodb
+from app.services.mongo_health import mongo_health, gridfs_health
+from app.services.tender_search import tender_index
+from app.services.document_index import document_indexer
+from app.services.processing import processing_pipeline
+from app.services.upload_sessions import upload_session_collector
+from app.services.storage_gc import storage_gc
 
 load_dotenv()
 
@@ -44,9 +50,37 @@ app.add_middleware(
 @app.on_event("startup")
 async def _startup() -> None:
     await connect_to_mongo()
+    if mongodb.mongo_db is not None:
+        mongo_health.record_success()
+        try:
+            await tender_index.load(mongodb.mongo_db)
+        except Exception as e:
+            # The index is loaded lazily on the first search instead
+            print(f"⚠️  Could not load tender search index: {e}")
+        try:
+            await document_indexer.load(mongodb.mongo_db)
+        except Exception as e:
+            # The index is loaded lazily on the first document search instead
+            print(f"⚠️  Could not load document text index: {e}")
+        try:
+            await processing_pipeline.rescan(mongodb.mongo_db)
+        except Exception as e:
+            print(f"⚠️  Could not re-queue unprocessed files: {e}")
+    # Files left "uploaded" or stuck in "processing" while MongoDB was unreachable are picked up once it is back
+    mongo_health.on_recovery(lambda: processing_pipeline.rescan(mongodb.get_mongo_db()))
+    mongo_health.start()
+    gridfs_health.start()
+    upload_session_collector.start()
+    storage_gc.start()
+    processing_pipeline.start()
 
 @app.on_event("shutdown")
 async def _shutdown() -> None:
+    await processing_pipeline.stop()
+    await storage_gc.stop()
+    await upload_session_collector.stop()
+    await gridfs_health.stop()
+    await mongo_health.stop()
     await close_mongo_connection()
 
 # Root endpoint
@@ -59,69 +93,73 @@ def read_root():
     }
 
 @app.get("/health/mongo")
-async def mongo_health():
-    try:
-        result = await ping_mongo()
-        return {
-            "status": "ok", 
-            "ping": result, 
-            "mongo_available": True,
-            "database": _get_database_name(),
-            "connection_pool": "active"
-        }
-    except Exception as e:
-        return {
-            "status": "error", 
-            "message": str(e), 
-            "mongo_available": False,
-            "error_type": type(e).__name__,
-            "database": _get_database_name() if 'mongo_db' in globals() and mongo_db else "unknown"
-        }
+async def mongo_health_status():
+    """MongoDB status from the background health monitor (no round trip)"""
+    health = mongo_health.status()
+    return {
+        "status": "ok" if health["mongo_available"] else "error",
+        "database": _get_database_name(),
+        **health
+    }
 
 @app.get("/health/gridfs")
-async def gridfs_health():
-    """Check GridFS storage status"""
+async def gridfs_health_status(deep: bool = False):
+    """
+    Check GridFS storage status.
+    
+    Returns the cached result of the background probe; pass ``deep=true`` to
+    run a full write/read/delete round trip instead.
+    """
+    if not deep:
+        health = gridfs_health.status()
+        return {
+            "status": "ok" if health["gridfs_available"] else "error",
+            "mode": "cached",
+            **health
+        }
+    
     try:
-        from app.services.mongodb import get_mongo_db
-        from motor.motor_asyncio import AsyncIOMotorGridFSBucket
-        
-        db = get_mongo_db()
-        fs = AsyncIOMotorGridFSBucket(db)
-        
-        # Test GridFS by creating a small test file
-        test_content = b"GridFS test file"
-        test_filename = f"test_{datetime.datetime.now().isoformat()}.txt"
-        
-        # Upload test file
-        file_id = await fs.upload_from_stream(
-            test_filename,
-            test_content,
-            metadata={"test": True}
-        )
-        
-        # Download and verify
-        download_stream = await fs.open_download_stream(file_id)
-        downloaded_content = await download_stream.read()
-        
-        # Clean up test file
-        await fs.delete(file_id)
-        
+        result = await gridfs_health.deep_check()
         return {
             "status": "ok",
+            "mode": "deep",
             "gridfs_available": True,
-            "test_file_upload": "success",
-            "test_file_download": "success",
-            "test_file_cleanup": "success",
+            **result,
             "message": "GridFS is working properly"
         }
     except Exception as e:
         return {
             "status": "error",
+            "mode": "deep",
             "gridfs_available": False,
             "message": str(e),
             "error_type": type(e).__name__
         }
 
+@app.get("/health/cache")
+async def cache_health():
+    """Hit/miss counters for the in-process caches"""
+    from app.services.file_service import metadata_cache
+    from app.services.content_cache import content_cache
+    from app.services.tender_search import search_cache
+    
+    return {
+        "status": "ok",
+        "file_metadata": metadata_cache.stats(),
+        "file_content": content_cache.stats(),
+        "tender_search": {**search_cache.stats(), "index_version": tender_index.version}
+    }
+
+@app.get("/health/processing")
+async def processing_health():
+    """Post-upload processing queue depth, outcomes and per-stage timings"""
+    return {
+        "status": "ok",
+        "pipeline": processing_pipeline.stats(),
+        "upload_sessions": upload_session_collector.stats(),
+        "document_index": document_indexer.stats()
+    }
+
 @app.get("/health")
 async def health_check():
     """Simple health check endpoint"""
@@ -143,36 +181,29 @@ app.include_router(reminders.router, prefix="/reminders", tags=["Reminders"])
 
 # File download endpoint
 @app.get("/files/{filename}")
-async def download_file(filename: str):
-    file_path = os.path.join(uploads_dir, filename)
-    if os.path.exists(file_path):
-        return FileResponse(file_path, filename=filename)
-    else:
-        from fastapi import HTTPException
+async def download_file(filename: str, request: Request):
+    from app.services.download_service import build_path_response
+    
+    if os.path.basename(filename) != filename:
         raise HTTPException(status_code=404, detail="File not found")
+    file_path = os.path.join(uploads_dir, filename)
+    return build_path_response(request, file_path, filename)
 
 # MongoDB file download endpoint
 @app.get("/files/mongo/{file_id}")
-async def download_file_by_id(file_id: str):
-    """Download file by MongoDB file ID"""
+async def download_file_by_id(file_id: str, request: Request, inline: bool = False):
+    """Download file by MongoDB file ID (supports Range and conditional GET)"""
     try:
-        from app.services.file_service import get_file_content, get_file_metadata
-        import io
-        from fastapi.responses import StreamingResponse
-        
-        file_content = await get_file_content(file_id)
-        if not file_content:
-            raise HTTPException(status_code=404, detail="File not found")
+        from app.services.file_service import get_file_metadata
+        from app.services.download_service import build_file_response
         
         metadata = await get_file_metadata(file_id)
         if not metadata:
-            raise HTTPException(status_code=404, detail="File metadata not found")
+            raise HTTPException(status_code=404, detail="File not found")
         
-        return StreamingResponse(
-            io.BytesIO(file_content),
-            media_type=metadata.get("content_type", "application/pdf"),
-            headers={"Content-Disposition": f"attachment; filename={metadata['original_filename']}"}
-        )
+        return await build_file_response(request, metadata, inline)
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error downloading file by ID: {e}")
         raise HTTPException(status_code=500, detail=str(e))
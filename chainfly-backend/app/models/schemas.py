@@ -1,6 +1,6 @@
 # schemas.py - Pydantic models will be defined here.
 
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 from typing import List, Optional
 from sqlalchemy import Column, Integer, String, DateTime, Text
 from sqlalchemy.ext.declarative import declarative_base
@@ -10,11 +10,49 @@ import json
 Base = declarative_base()
 
 class TenderSearchRequest(BaseModel):
-    keyword: Optional[str]
-    location: Optional[str]
-    capacity_range: Optional[str]
-    deadline: Optional[str]
-    sector: Optional[str]
+    keyword: Optional[str] = None
+    location: Optional[str] = None
+    capacity_range: Optional[str] = None
+    deadline: Optional[str] = None
+    sector: Optional[str] = None
+    status: Optional[str] = None
+
+class TenderBase(BaseModel):
+    title: Optional[str] = None
+    description: Optional[str] = None
+    issuing_authority: Optional[str] = None
+    source_portal: Optional[str] = None
+    sector: Optional[str] = None
+    location: Optional[str] = None
+    status: Optional[str] = None
+    capacity: Optional[str] = None
+    capacity_mw: Optional[float] = None
+    value: Optional[float] = None
+    deadline: Optional[datetime.datetime] = None
+    url: Optional[str] = None
+
+    @field_validator("deadline", mode="before")
+    @classmethod
+    def _date_only_deadline(cls, value):
+        # Portals often publish a bare closing date; treat it as midnight
+        if isinstance(value, str) and len(value.strip()) == 10:
+            return f"{value.strip()}T00:00:00"
+        return value
+
+    @field_validator("capacity", mode="before")
+    @classmethod
+    def _capacity_as_text(cls, value):
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return f"{value} MW"
+        return value
+
+class TenderCreate(TenderBase):
+    tender_number: str
+    title: str
+    status: Optional[str] = "open"
+
+class TenderUpdate(TenderBase):
+    tender_number: Optional[str] = None
 
 class ReminderRequest(BaseModel):
     tender_id: str
@@ -47,6 +85,20 @@ class DownloadHistoryCreate(BaseModel):
     download_date: datetime.datetime
     documents: List[dict]
 
+class DocumentBundleRequest(BaseModel):
+    zip_name: str
+    file_ids: List[str]
+
+class DocumentBatchDeleteRequest(BaseModel):
+    file_ids: List[str]
+
+class UploadSessionCreate(BaseModel):
+    tender_id: str
+    document_type: str
+    filename: str
+    file_size: int
+    content_type: Optional[str] = None
+
 class ReminderHistory(Base):
     __tablename__ = "reminder_history"
     id = Column(Integer, primary_key=True, index=True)
@@ -1,17 +1,26 @@
 # documents.py - Document-related endpoints will be defined here.
 
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends, Query
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends, Query, Request
 import os
-from app.services.file_service import save_file_to_mongodb, list_all_files, get_file_metadata, delete_file, get_file_content
-from typing import List, Dict
+import asyncio
+from app.services.file_service import save_file_to_mongodb, save_files_to_mongodb, list_files_page, get_file_metadata, get_files_metadata, delete_file, delete_files, check_mongo_available, is_quarantined, MAX_LIST_PAGE_SIZE, MAX_BATCH_DELETE_SIZE
+from app.services.download_service import build_file_response, content_exists
+from app.services.bundle_service import iter_zip_bundle
+from typing import List, Dict, Optional
 import stat
 from sqlalchemy.orm import Session
-from app.models.schemas import DownloadHistory, DownloadHistoryCreate
+from app.models.schemas import DownloadHistory, DownloadHistoryCreate, DocumentBundleRequest, UploadSessionCreate, DocumentBatchDeleteRequest
 from app.services.compliance import get_db
 import json
 import datetime
 from fastapi.responses import StreamingResponse
-import io
+from app.utils.http_utils import content_disposition
+from app.services.document_index import document_indexer, MAX_DOCUMENT_SEARCH_PAGE_SIZE
+from app.services.processing import processing_pipeline
+from app.services.storage_gc import storage_gc
+from app.services.upload_sessions import (
+    create_upload_session, get_upload_session, write_upload_chunk, finalize_upload_session, abort_upload_session
+)
 
 router = APIRouter()
 
@@ -22,24 +31,170 @@ async def upload_document(
     file: UploadFile = File(...),
     store_in_gridfs: bool = Query(True, description="Store file content in MongoDB GridFS instead of filesystem")
 ):
+    """
+    Store a PDF and queue it for processing.
+
+    Only the header and trailer are checked before this returns. The full
+    structural check runs in the background; a file that fails it is
+    quarantined: still visible through GET /documents/{file_id} with its
+    quarantine_reason, but no longer listed or downloadable.
+    """
     try:
         result = await save_file_to_mongodb(file, tender_id, document_type, store_in_gridfs)
+        if result["mongo_available"]:
+            processing_pipeline.enqueue(result["file_id"])
         return {"message": "File uploaded successfully", "file_data": result}
+    except HTTPException:
+        raise
     except Exception as e:
         # Log the error to console
         print(f"\u274c Error while uploading file: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/upload/batch")
+async def upload_documents_batch(
+    tender_id: str = Form(...),
+    document_type: str = Form(...),
+    files: List[UploadFile] = File(...),
+    store_in_gridfs: bool = Query(True, description="Store file content in MongoDB GridFS instead of filesystem")
+):
+    """Upload many files for one tender; returns a result per file"""
+    try:
+        results = await save_files_to_mongodb(files, tender_id, document_type, store_in_gridfs)
+        uploaded = sum(1 for result in results if result["status"] == "success")
+        for result in results:
+            if result["status"] == "success" and result["mongo_available"]:
+                processing_pipeline.enqueue(result["file_id"])
+        return {
+            "message": f"{uploaded} of {len(results)} files uploaded successfully",
+            "uploaded": uploaded,
+            "failed": len(results) - uploaded,
+            "files": results
+        }
+    except Exception as e:
+        print(f"\u274c Error while uploading batch: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/uploads", status_code=201)
+async def start_resumable_upload(session: UploadSessionCreate):
+    """Start a resumable upload; send the bytes with PUT /uploads/{session_id}"""
+    try:
+        return await create_upload_session(
+            session.tender_id, session.document_type, session.filename, session.file_size, session.content_type
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"\u274c Error while starting upload session: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/uploads/{session_id}")
+async def get_resumable_upload(session_id: str):
+    """Session status; ``received`` is the offset to resume from"""
+    try:
+        return await get_upload_session(session_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error getting upload session: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.put("/uploads/{session_id}")
+async def upload_chunk(
+    session_id: str,
+    request: Request,
+    offset: int = Query(..., ge=0, description="Byte offset of this chunk in the file")
+):
+    """Append the raw request body to the session at ``offset``"""
+    try:
+        return await write_upload_chunk(session_id, offset, request.stream())
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"\u274c Error while writing upload chunk: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/uploads/{session_id}/complete")
+async def complete_resumable_upload(session_id: str):
+    """Assemble a fully received session into a stored document"""
+    try:
+        result = await finalize_upload_session(session_id)
+        processing_pipeline.enqueue(result["file_id"])
+        return {"message": "File uploaded successfully", "file_data": result}
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"\u274c Error while finalizing upload: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.delete("/uploads/{session_id}")
+async def abort_resumable_upload(session_id: str):
+    """Abandon a session and drop the bytes received so far"""
+    try:
+        if not await abort_upload_session(session_id):
+            raise HTTPException(status_code=404, detail="Upload session not found")
+        return {"status": "success", "message": "Upload session aborted"}
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error aborting upload session: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/list")
-async def list_all_documents():
-    """List all documents from MongoDB"""
+async def list_all_documents(
+    limit: int = Query(100, ge=1, le=MAX_LIST_PAGE_SIZE, description="Page size"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    tender_id: Optional[str] = Query(None),
+    document_type: Optional[str] = Query(None),
+    include_quarantined: bool = Query(False, description="Also list files quarantined by validation")
+):
+    """List documents from MongoDB, newest first, one page at a time"""
     try:
-        documents = await list_all_files()
-        return {"documents": documents}
+        return await list_files_page(limit, cursor, tender_id, document_type, include_quarantined)
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error listing documents: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/search")
+async def search_documents(
+    q: str = Query(..., min_length=1, description="Words to find in document text"),
+    tender_id: Optional[str] = Query(None),
+    document_type: Optional[str] = Query(None),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=MAX_DOCUMENT_SEARCH_PAGE_SIZE)
+):
+    """Full-text search over uploaded PDFs; returns ranked pages with snippets"""
+    try:
+        return await document_indexer.search(q, tender_id, document_type, page, page_size)
+    except Exception as e:
+        print(f"Error searching documents: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/gc")
+async def storage_gc_status():
+    """Storage garbage collector settings and the report of its last run"""
+    return storage_gc.stats()
+
+@router.post("/gc")
+async def run_storage_gc(
+    dry_run: bool = Query(True, description="Only report orphans; pass false to reclaim them")
+):
+    """Reconcile stored content against the files collection now and return the report"""
+    try:
+        db = check_mongo_available()
+        if db is None:
+            raise HTTPException(status_code=503, detail="MongoDB is not available")
+        if storage_gc.running:
+            raise HTTPException(status_code=409, detail="A storage GC run is already in progress")
+        return await storage_gc.collect(db, dry_run)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error running storage GC: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.post("/download-history")
 async def add_download_history(download: DownloadHistoryCreate, db: Session = Depends(get_db)):
     """Add a download history record"""
@@ -95,6 +250,75 @@ async def clear_download_history(db: Session = Depends(get_db)):
         print(f"Error clearing download history: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/delete")
+async def delete_documents_batch(request: DocumentBatchDeleteRequest):
+    """Delete many documents at once; reports which ids were deleted and which were not found"""
+    try:
+        file_ids = list(dict.fromkeys(request.file_ids))
+        if not file_ids:
+            raise HTTPException(status_code=400, detail="No documents selected")
+        if len(file_ids) > MAX_BATCH_DELETE_SIZE:
+            raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_DELETE_SIZE} documents can be deleted at once")
+        result = await delete_files(file_ids)
+        if result["deleted"]:
+            await document_indexer.remove_many(result["deleted"])
+        return {"status": "success", **result}
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error deleting documents: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/bundle")
+async def download_bundle(bundle: DocumentBundleRequest, db: Session = Depends(get_db)):
+    """Stream a ZIP of the selected documents and record it in the download history"""
+    try:
+        file_ids = list(dict.fromkeys(bundle.file_ids))
+        if not file_ids:
+            raise HTTPException(status_code=400, detail="No documents selected")
+        
+        file_docs = await get_files_metadata(file_ids)
+        found_ids = {file_doc["_id"] for file_doc in file_docs}
+        missing = [file_id for file_id in file_ids if file_id not in found_ids]
+        # Check every file before the history row is written and the ZIP starts streaming
+        present = await asyncio.gather(*(content_exists(file_doc) for file_doc in file_docs))
+        missing += [file_doc["_id"] for file_doc, exists in zip(file_docs, present) if not exists]
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Files not found: {', '.join(missing)}")
+        quarantined = [file_doc["_id"] for file_doc in file_docs if is_quarantined(file_doc)]
+        if quarantined:
+            raise HTTPException(status_code=409, detail=f"Files failed validation: {', '.join(quarantined)}")
+        
+        documents = [
+            {
+                "id": file_doc["_id"],
+                "filename": file_doc["original_filename"],
+                "tender_id": file_doc["tender_id"],
+                "document_type": file_doc["document_type"]
+            }
+            for file_doc in file_docs
+        ]
+        db_download = DownloadHistory(
+            zip_name=bundle.zip_name,
+            download_date=datetime.datetime.utcnow(),
+            documents_json=json.dumps(documents)
+        )
+        db.add(db_download)
+        db.commit()
+        
+        zip_filename = bundle.zip_name if bundle.zip_name.lower().endswith(".zip") else f"{bundle.zip_name}.zip"
+        return StreamingResponse(
+            iter_zip_bundle(file_docs),
+            media_type="application/zip",
+            headers={"Content-Disposition": content_disposition(zip_filename)}
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        print(f"Error creating document bundle: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 # MongoDB-based file operations
 @router.get("/{file_id}")
 async def get_document_metadata(file_id: str):
@@ -109,22 +333,20 @@ async def get_document_metadata(file_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{file_id}/download")
-async def download_document(file_id: str):
-    """Download document by file ID"""
+async def download_document(
+    file_id: str,
+    request: Request,
+    inline: bool = Query(False, description="Serve with Content-Disposition: inline for the browser viewer")
+):
+    """Download document by file ID (supports Range and conditional GET)"""
     try:
         metadata = await get_file_metadata(file_id)
         if not metadata:
             raise HTTPException(status_code=404, detail="File not found")
         
-        file_content = await get_file_content(file_id)
-        if not file_content:
-            raise HTTPException(status_code=404, detail="File content not found")
-        
-        return StreamingResponse(
-            io.BytesIO(file_content),
-            media_type=metadata.get("content_type", "application/pdf"),
-            headers={"Content-Disposition": f"attachment; filename={metadata['original_filename']}"}
-        )
+        return await build_file_response(request, metadata, inline)
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error downloading document: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -136,6 +358,7 @@ async def delete_document(file_id: str):
         success = await delete_file(file_id)
         if not success:
             raise HTTPException(status_code=404, detail="File not found")
+        await document_indexer.remove(file_id)
         return {"status": "success", "message": "File deleted successfully"}
     except Exception as e:
         print(f"Error deleting document: {e}")
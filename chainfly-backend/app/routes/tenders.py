@@ -1,13 +1,100 @@
 # tenders.py - Tender-related endpoints will be defined here.
 
-from fastapi import APIRouter
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, UploadFile, File
+from app.models.schemas import TenderSearchRequest, TenderCreate, TenderUpdate
 from app.services.mongodb import get_mongo_db
+from app.services.tender_search import tender_index, ensure_tender_index_loaded, MAX_SEARCH_PAGE_SIZE
+from app.services.tender_suggest import SUGGEST_TOP_K
+from app.services.tender_service import (
+	create_tender, get_tender, update_tender, delete_tender, list_tenders_page,
+	import_tenders, detect_import_format, MAX_TENDER_PAGE_SIZE
+)
 
 router = APIRouter()
 
+@router.get("")
+async def list_tenders(
+	limit: int = Query(100, ge=1, le=MAX_TENDER_PAGE_SIZE, description="Page size"),
+	cursor: Optional[str] = Query(None, description="next_cursor from the previous page")
+):
+	"""List tenders from MongoDB, newest first, one page at a time"""
+	try:
+		return await list_tenders_page(limit, cursor)
+	except HTTPException:
+		raise
+	except Exception as e:
+		print(f"Error listing tenders: {e}")
+		raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("", status_code=201)
+async def create_tender_route(tender: TenderCreate):
+	try:
+		return await create_tender(tender)
+	except HTTPException:
+		raise
+	except Exception as e:
+		print(f"Error creating tender: {e}")
+		raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/import")
+async def import_tenders_route(
+	file: UploadFile = File(...),
+	format: Optional[str] = Query(None, description="ndjson or csv; detected from the file name if omitted")
+):
+	"""Stream-import an NDJSON or CSV tender feed, upserting on tender_number"""
+	try:
+		import_format = detect_import_format(file.filename, file.content_type, format)
+		report = await import_tenders(file, import_format)
+		return {"message": f"Imported {report['inserted'] + report['updated']} tenders", **report}
+	except HTTPException:
+		raise
+	except Exception as e:
+		print(f"Error importing tenders: {e}")
+		raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/search")
-async def search_tenders():
-	return {"message": "Tenders search working!"}
+async def search_tenders(
+	keyword: Optional[str] = Query(None, description="Free-text query over title and description"),
+	location: Optional[str] = Query(None),
+	capacity_range: Optional[str] = Query(None, description="Capacity in MW, e.g. '10-50 MW', '>=5', '100+'"),
+	deadline: Optional[str] = Query(None, description="'14d' for the next 14 days, '2024-07-01..2024-07-31', or a closing-by date"),
+	sector: Optional[str] = Query(None),
+	status: Optional[str] = Query(None, description="open, closed or awarded"),
+	page: int = Query(1, ge=1),
+	page_size: int = Query(20, ge=1, le=MAX_SEARCH_PAGE_SIZE),
+	collapse_duplicates: bool = Query(True, description="Show one tender per duplicate cluster")
+):
+	"""Search tenders with BM25 keyword ranking and structured filters, with facet counts"""
+	try:
+		await ensure_tender_index_loaded()
+		request = TenderSearchRequest(
+			keyword=keyword,
+			location=location,
+			capacity_range=capacity_range,
+			deadline=deadline,
+			sector=sector,
+			status=status
+		)
+		return tender_index.cached_search(request, page, page_size, collapse_duplicates)
+	except HTTPException:
+		raise
+	except Exception as e:
+		print(f"Error searching tenders: {e}")
+		raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/suggest")
+async def suggest_tenders(
+	q: str = Query(..., min_length=1, description="What the user has typed so far"),
+	limit: int = Query(10, ge=1, le=SUGGEST_TOP_K)
+):
+	"""Autocomplete tender titles, issuing authorities and locations"""
+	try:
+		await ensure_tender_index_loaded()
+		return {"query": q, "suggestions": tender_index.suggestions.suggest(q, limit)}
+	except Exception as e:
+		print(f"Error suggesting tenders: {e}")
+		raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/mongo-sample")
 async def mongo_sample():
@@ -15,3 +102,38 @@ async def mongo_sample():
 	db = get_mongo_db()
 	collections = await db.list_collection_names()
 	return {"status": "ok", "collections": collections}
+
+@router.get("/{tender_id}")
+async def get_tender_route(tender_id: str):
+	try:
+		tender = await get_tender(tender_id)
+	except Exception as e:
+		print(f"Error fetching tender: {e}")
+		raise HTTPException(status_code=500, detail=str(e))
+	if tender is None:
+		raise HTTPException(status_code=404, detail="Tender not found")
+	return tender
+
+@router.put("/{tender_id}")
+async def update_tender_route(tender_id: str, tender: TenderUpdate):
+	try:
+		updated = await update_tender(tender_id, tender)
+	except HTTPException:
+		raise
+	except Exception as e:
+		print(f"Error updating tender: {e}")
+		raise HTTPException(status_code=500, detail=str(e))
+	if updated is None:
+		raise HTTPException(status_code=404, detail="Tender not found")
+	return updated
+
+@router.delete("/{tender_id}")
+async def delete_tender_route(tender_id: str):
+	try:
+		deleted = await delete_tender(tender_id)
+	except Exception as e:
+		print(f"Error deleting tender: {e}")
+		raise HTTPException(status_code=500, detail=str(e))
+	if not deleted:
+		raise HTTPException(status_code=404, detail="Tender not found")
+	return {"message": "Tender deleted successfully"}
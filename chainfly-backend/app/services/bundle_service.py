@@ -0,0 +1,79 @@
+import os
+import io
+import zipfile
+from datetime import datetime
+from typing import List, Dict, Any, AsyncIterator
+from app.services.file_service import iter_file_content
+from app.utils.http_utils import to_utc_datetime
+
+# Already-compressed formats are stored as-is; compressing them again only burns CPU
+STORED_EXTENSIONS = {'.pdf', '.zip', '.png', '.jpg', '.jpeg'}
+
+
+class _ZipSink(io.RawIOBase):
+    """Write-only, non-seekable buffer that zipfile writes into and the response drains"""
+
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _unique_name(filename: str, used: set) -> str:
+    """Avoid duplicate entry names when several documents share a filename"""
+    name = filename
+    stem, ext = os.path.splitext(filename)
+    counter = 2
+    while name in used:
+        name = f"{stem} ({counter}){ext}"
+        counter += 1
+    used.add(name)
+    return name
+
+
+def _zip_info(file_doc: Dict[str, Any], name: str) -> zipfile.ZipInfo:
+    uploaded_at = to_utc_datetime(file_doc.get("uploaded_at")) or datetime.utcnow()
+    zinfo = zipfile.ZipInfo(name, date_time=uploaded_at.timetuple()[:6])
+    zinfo.file_size = file_doc.get("file_size", 0)
+    if os.path.splitext(name.lower())[1] in STORED_EXTENSIONS:
+        zinfo.compress_type = zipfile.ZIP_STORED
+    else:
+        zinfo.compress_type = zipfile.ZIP_DEFLATED
+    return zinfo
+
+
+async def iter_zip_bundle(file_docs: List[Dict[str, Any]]) -> AsyncIterator[bytes]:
+    """
+    Stream a ZIP archive of the given files.
+
+    Each file is read from its storage in chunks and written straight into
+    the archive, so only one chunk is held in memory at a time.
+    """
+    sink = _ZipSink()
+    used_names: set = set()
+    with zipfile.ZipFile(sink, mode="w", allowZip64=True) as archive:
+        for file_doc in file_docs:
+            zinfo = _zip_info(file_doc, _unique_name(file_doc["original_filename"], used_names))
+            with archive.open(zinfo, mode="w") as entry:
+                async for chunk in iter_file_content(file_doc):
+                    entry.write(chunk)
+                    data = sink.drain()
+                    if data:
+                        yield data
+            data = sink.drain()
+            if data:
+                yield data
+    # Central directory
+    data = sink.drain()
+    if data:
+        yield data
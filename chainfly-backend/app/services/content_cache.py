@@ -0,0 +1,159 @@
+import os
+import asyncio
+from collections import OrderedDict
+from typing import Optional, Dict, Any
+import aiofiles
+import aiofiles.os
+
+# Only files with this suffix in the cache directory belong to the cache
+CACHE_FILE_SUFFIX = ".cached"
+
+
+class ContentCache:
+    """
+    Two-tier LRU cache for the bytes of frequently downloaded files.
+
+    Hot files are kept in memory up to ``memory_bytes``. Entries evicted from
+    memory spill to ``cache_dir`` on local disk up to ``disk_bytes`` before
+    being dropped. Entries are keyed by file id and remember the ETag they
+    were cached under, so a lookup with a different ETag is a miss.
+    """
+
+    def __init__(
+        self,
+        enabled: bool,
+        memory_bytes: int,
+        disk_bytes: int,
+        max_entry_bytes: int,
+        cache_dir: str
+    ):
+        self.enabled = enabled
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.cache_dir = cache_dir
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._disk: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._memory_used = 0
+        self._disk_used = 0
+        self._disk_ready = False
+        self._lock = asyncio.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.memory_evictions = 0
+        self.disk_evictions = 0
+
+    def accepts(self, size: int) -> bool:
+        """Whether a file of this size is worth caching"""
+        return self.enabled and 0 < size <= self.max_entry_bytes
+
+    def get_memory(self, file_id: str, etag: str) -> Optional[bytes]:
+        """Return cached bytes from the memory tier, or None"""
+        entry = self._memory.get(file_id)
+        if entry is None or entry["etag"] != etag:
+            return None
+        self._memory.move_to_end(file_id)
+        self.memory_hits += 1
+        return entry["content"]
+
+    def get_disk_path(self, file_id: str, etag: str) -> Optional[str]:
+        """Return the path of a cached copy in the disk tier, or None"""
+        entry = self._disk.get(file_id)
+        if entry is None or entry["etag"] != etag or not os.path.exists(entry["path"]):
+            return None
+        self._disk.move_to_end(file_id)
+        self.disk_hits += 1
+        return entry["path"]
+
+    def record_miss(self) -> None:
+        self.misses += 1
+
+    async def put(self, file_id: str, etag: str, content: bytes) -> None:
+        """Insert content into the memory tier, spilling older entries to disk"""
+        if not self.accepts(len(content)):
+            return
+        async with self._lock:
+            self._drop_memory(file_id)
+            await self._drop_disk(file_id)
+            self._memory[file_id] = {"etag": etag, "content": content}
+            self._memory_used += len(content)
+            while self._memory_used > self.memory_bytes and self._memory:
+                evicted_id, evicted = self._memory.popitem(last=False)
+                self._memory_used -= len(evicted["content"])
+                self.memory_evictions += 1
+                await self._spill(evicted_id, evicted)
+
+    async def invalidate(self, file_id: str) -> None:
+        async with self._lock:
+            self._drop_memory(file_id)
+            await self._drop_disk(file_id)
+
+    def _drop_memory(self, file_id: str) -> None:
+        entry = self._memory.pop(file_id, None)
+        if entry is not None:
+            self._memory_used -= len(entry["content"])
+
+    async def _drop_disk(self, file_id: str) -> None:
+        entry = self._disk.pop(file_id, None)
+        if entry is not None:
+            self._disk_used -= entry["size"]
+            try:
+                await aiofiles.os.remove(entry["path"])
+            except FileNotFoundError:
+                pass
+
+    async def _spill(self, file_id: str, entry: Dict[str, Any]) -> None:
+        size = len(entry["content"])
+        if size > self.disk_bytes:
+            return
+        if not self._disk_ready:
+            await aiofiles.os.makedirs(self.cache_dir, exist_ok=True)
+            # Entries left over from a previous process are not tracked; drop them, and
+            # nothing else, in case the directory is shared with real data by mistake
+            for name in await aiofiles.os.listdir(self.cache_dir):
+                if name.endswith(CACHE_FILE_SUFFIX):
+                    try:
+                        await aiofiles.os.remove(os.path.join(self.cache_dir, name))
+                    except (FileNotFoundError, IsADirectoryError):
+                        pass
+            self._disk_ready = True
+
+        while self._disk_used + size > self.disk_bytes and self._disk:
+            evicted_id, _ = next(iter(self._disk.items()))
+            await self._drop_disk(evicted_id)
+            self.disk_evictions += 1
+
+        path = os.path.join(self.cache_dir, f"{file_id}{CACHE_FILE_SUFFIX}")
+        async with aiofiles.open(path, "wb") as f:
+            await f.write(entry["content"])
+        self._disk[file_id] = {"etag": entry["etag"], "path": path, "size": size}
+        self._disk_used += size
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "memory_entries": len(self._memory),
+            "memory_bytes_used": self._memory_used,
+            "memory_bytes_limit": self.memory_bytes,
+            "disk_entries": len(self._disk),
+            "disk_bytes_used": self._disk_used,
+            "disk_bytes_limit": self.disk_bytes,
+            "max_entry_bytes": self.max_entry_bytes,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "memory_evictions": self.memory_evictions,
+            "disk_evictions": self.disk_evictions,
+            "hit_ratio": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0
+        }
+
+
+content_cache = ContentCache(
+    enabled=os.environ.get("CONTENT_CACHE_ENABLED", "false").lower() == "true",
+    memory_bytes=int(os.environ.get("CONTENT_CACHE_MEMORY_BYTES", 64 * 1024 * 1024)),
+    disk_bytes=int(os.environ.get("CONTENT_CACHE_DISK_BYTES", 512 * 1024 * 1024)),
+    max_entry_bytes=int(os.environ.get("CONTENT_CACHE_MAX_ENTRY_BYTES", 16 * 1024 * 1024)),
+    cache_dir=os.environ.get("CONTENT_CACHE_DIR", os.path.join(os.getcwd(), "content_cache"))
+)
@@ -0,0 +1,241 @@
+import math
+import asyncio
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Tuple
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pypdf import PdfReader
+from app.services.mongodb import get_mongo_db
+from app.services.mongo_health import mongo_health
+from app.services.processing import processing_pipeline, ProcessingContext
+from app.utils.text_utils import tokenize, build_snippet
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+MAX_DOCUMENT_SEARCH_PAGE_SIZE = 50
+
+# Characters of page text returned around the first matching term
+SNIPPET_CHARS = 160
+
+# File fields copied onto indexed pages for filtering and display
+PAGE_FILE_FIELDS = ("tender_id", "document_type", "original_filename")
+
+PageKey = Tuple[str, int]
+
+
+def extract_pdf_pages(path: str) -> List[str]:
+    """Text of every page of a PDF file; CPU-bound, so run it off the event loop"""
+    reader = PdfReader(path)
+    return [page.extract_text() or "" for page in reader.pages]
+
+
+class DocumentTextIndex:
+    """
+    In-process inverted index over the pages of uploaded PDFs.
+
+    Each (file_id, page) pair is one BM25 document. Only postings and
+    lengths are held in memory; page text lives in the ``document_pages``
+    collection and is fetched for snippets of the hits being returned.
+    """
+
+    def __init__(self):
+        self._keys: List[Optional[PageKey]] = []
+        self._ids: Dict[PageKey, int] = {}
+        self._free: List[int] = []
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._page_terms: Dict[int, Dict[str, int]] = {}
+        self._lengths: Dict[int, int] = {}
+        self._total_length = 0
+        self._files: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def page_count(self) -> int:
+        return len(self._ids)
+
+    @property
+    def file_count(self) -> int:
+        return len(self._files)
+
+    def add_page(self, file_id: str, page: int, text: str, file_fields: Dict[str, Any]) -> None:
+        terms: Dict[str, int] = {}
+        for term in tokenize(text):
+            terms[term] = terms.get(term, 0) + 1
+        if not terms:
+            return
+        key = (file_id, page)
+        if key in self._ids:
+            self._remove_page(key)
+        if self._free:
+            page_id = self._free.pop()
+            self._keys[page_id] = key
+        else:
+            page_id = len(self._keys)
+            self._keys.append(key)
+        self._ids[key] = page_id
+        self._page_terms[page_id] = terms
+        self._lengths[page_id] = sum(terms.values())
+        self._total_length += self._lengths[page_id]
+        for term, frequency in terms.items():
+            self._postings.setdefault(term, {})[page_id] = frequency
+        file_entry = self._files.setdefault(file_id, {"pages": set()})
+        file_entry.update({field: file_fields.get(field) for field in PAGE_FILE_FIELDS})
+        file_entry["pages"].add(page)
+
+    def _remove_page(self, key: PageKey) -> None:
+        page_id = self._ids.pop(key)
+        self._keys[page_id] = None
+        self._free.append(page_id)
+        self._total_length -= self._lengths.pop(page_id, 0)
+        for term in self._page_terms.pop(page_id, {}):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(page_id, None)
+                if not postings:
+                    del self._postings[term]
+
+    def remove_file(self, file_id: str) -> bool:
+        file_entry = self._files.pop(file_id, None)
+        if file_entry is None:
+            return False
+        for page in file_entry["pages"]:
+            if (file_id, page) in self._ids:
+                self._remove_page((file_id, page))
+        return True
+
+    def search(
+        self,
+        terms: List[str],
+        tender_id: Optional[str] = None,
+        document_type: Optional[str] = None
+    ) -> List[Tuple[PageKey, float]]:
+        """Pages matching any term, best BM25 score first"""
+        page_count = self.page_count
+        if not page_count or not terms:
+            return []
+        average_length = self._total_length / page_count or 1.0
+        scores: Dict[int, float] = {}
+        for term in set(terms):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (page_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for page_id, frequency in postings.items():
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self._lengths[page_id] / average_length)
+                scores[page_id] = scores.get(page_id, 0.0) + idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+
+        hits = []
+        for page_id, score in scores.items():
+            file_id, page = self._keys[page_id]
+            file_entry = self._files[file_id]
+            if tender_id and file_entry.get("tender_id") != tender_id:
+                continue
+            if document_type and file_entry.get("document_type") != document_type:
+                continue
+            hits.append(((file_id, page), score))
+        hits.sort(key=lambda hit: (-hit[1], hit[0]))
+        return hits
+
+    def file_fields(self, file_id: str) -> Dict[str, Any]:
+        file_entry = self._files.get(file_id, {})
+        return {field: file_entry.get(field) for field in PAGE_FILE_FIELDS}
+
+
+class DocumentIndexer:
+    """
+    Full-text indexing of uploaded PDFs, run as a processing pipeline stage.
+
+    Text is extracted on the pipeline's thread pool and the pages are
+    stored in ``document_pages`` before they are added to the in-memory
+    index, so the index can be rebuilt without re-extracting anything.
+    """
+
+    def __init__(self):
+        self.index = DocumentTextIndex()
+        self.loaded = False
+        self._load_lock = asyncio.Lock()
+
+    async def load(self, db: AsyncIOMotorDatabase) -> None:
+        """Rebuild the in-memory index from the stored page text"""
+        async with self._load_lock:
+            index = DocumentTextIndex()
+            async for page_doc in db.document_pages.find({}):
+                index.add_page(page_doc["file_id"], page_doc["page"], page_doc["text"], page_doc)
+            self.index = index
+            self.loaded = True
+            print(f"✅ Document text index loaded: {index.file_count} files, {index.page_count} pages")
+
+    async def index_file(self, context: ProcessingContext) -> Dict[str, Any]:
+        """Pipeline processor: extract, store and index the pages of one file"""
+        file_id, file_doc = context.file_id, context.file_doc
+        pages = await processing_pipeline.run_blocking(extract_pdf_pages, await context.path())
+
+        db = get_mongo_db()
+        file_fields = {field: file_doc.get(field) for field in PAGE_FILE_FIELDS}
+        page_docs = [
+            {"_id": f"{file_id}:{number}", "file_id": file_id, "page": number, "text": text, **file_fields}
+            for number, text in enumerate(pages, start=1)
+            if text.strip()
+        ]
+        await db.document_pages.delete_many({"file_id": file_id})
+        if page_docs:
+            await db.document_pages.insert_many(page_docs, ordered=False)
+
+        self.index.remove_file(file_id)
+        for page_doc in page_docs:
+            self.index.add_page(file_id, page_doc["page"], page_doc["text"], file_fields)
+        return {"page_count": len(pages), "text_indexed_at": datetime.utcnow()}
+
+    async def remove(self, file_id: str) -> None:
+        await self.remove_many([file_id])
+
+    async def remove_many(self, file_ids: List[str]) -> None:
+        for file_id in file_ids:
+            self.index.remove_file(file_id)
+        await get_mongo_db().document_pages.delete_many({"file_id": {"$in": file_ids}})
+
+    async def search(
+        self,
+        query: str,
+        tender_id: Optional[str] = None,
+        document_type: Optional[str] = None,
+        page: int = 1,
+        page_size: int = 20
+    ) -> Dict[str, Any]:
+        """Ranked page hits with snippets of the stored page text"""
+        if not self.loaded and mongo_health.is_available():
+            await self.load(get_mongo_db())
+        page = max(page, 1)
+        page_size = max(1, min(page_size, MAX_DOCUMENT_SEARCH_PAGE_SIZE))
+        terms = tokenize(query)
+        hits = self.index.search(terms, tender_id, document_type)
+        start = (page - 1) * page_size
+        page_hits = hits[start:start + page_size]
+
+        texts: Dict[str, str] = {}
+        if page_hits:
+            ids = [f"{file_id}:{number}" for (file_id, number), _ in page_hits]
+            async for page_doc in get_mongo_db().document_pages.find({"_id": {"$in": ids}}, {"text": 1}):
+                texts[page_doc["_id"]] = page_doc["text"]
+
+        results = []
+        for (file_id, number), score in page_hits:
+            results.append({
+                "file_id": file_id,
+                "page": number,
+                "score": round(score, 4),
+                "snippet": build_snippet(texts.get(f"{file_id}:{number}", ""), terms, SNIPPET_CHARS),
+                **self.index.file_fields(file_id)
+            })
+        return {"results": results, "total": len(hits), "page": page, "page_size": page_size}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "loaded": self.loaded,
+            "files": self.index.file_count,
+            "pages": self.index.page_count
+        }
+
+
+document_indexer = DocumentIndexer()
+processing_pipeline.register("text_index", document_indexer.index_file, cleanup=document_indexer.remove)
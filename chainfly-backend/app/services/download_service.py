@@ -0,0 +1,232 @@
+import os
+import stat
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional, Tuple
+import anyio
+from fastapi import Request, HTTPException
+from fastapi.responses import Response, StreamingResponse, FileResponse
+from starlette.types import Scope, Receive, Send
+from app.services.file_service import iter_file_content, get_storage_backend, storage_ref, is_quarantined
+from app.utils.http_utils import (
+    parse_range_header,
+    build_etag,
+    to_utc_datetime,
+    format_http_date,
+    is_not_modified,
+    content_disposition
+)
+
+
+class PathFileResponse(FileResponse):
+    """
+    FileResponse that can serve a byte range of the file.
+
+    When the ASGI server advertises the ``http.response.pathsend`` or
+    ``http.response.zerocopysend`` extensions the file is handed to the
+    server so it can use sendfile; otherwise it falls back to threaded
+    chunked reads like FileResponse.
+    """
+
+    def __init__(self, path: str, byte_range: Optional[Tuple[int, int]] = None, **kwargs: Any) -> None:
+        super().__init__(path, **kwargs)
+        self.byte_range = byte_range
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        extensions = scope.get("extensions") or {}
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+
+        if self.send_header_only:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        elif self.byte_range is None and "http.response.pathsend" in extensions:
+            await send({"type": "http.response.pathsend", "path": os.fspath(self.path)})
+        else:
+            start, end = self.byte_range or (0, self.stat_result.st_size - 1)
+            count = end - start + 1
+            if "http.response.zerocopysend" in extensions:
+                async with await anyio.open_file(self.path, mode="rb") as file:
+                    await send({
+                        "type": "http.response.zerocopysend",
+                        "file": file.wrapped.fileno(),
+                        "offset": start,
+                        "count": count,
+                        "more_body": False,
+                    })
+            else:
+                async with await anyio.open_file(self.path, mode="rb") as file:
+                    await file.seek(start)
+                    remaining = count
+                    while True:
+                        chunk = await file.read(min(self.chunk_size, remaining)) if remaining > 0 else b""
+                        remaining -= len(chunk)
+                        more_body = remaining > 0 and len(chunk) > 0
+                        await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+                        if not more_body:
+                            break
+
+        if self.background is not None:
+            await self.background()
+
+
+def build_path_response(
+    request: Request,
+    path: str,
+    filename: str,
+    media_type: Optional[str] = None,
+    etag: Optional[str] = None,
+    last_modified: Optional[datetime] = None,
+    inline: bool = False
+) -> Response:
+    """
+    Serve a file on local disk by path, with Range and conditional GET.
+
+    Validators default to ones derived from the file's stat result.
+    """
+    try:
+        stat_result = os.stat(path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="File not found")
+    if not stat.S_ISREG(stat_result.st_mode):
+        raise HTTPException(status_code=404, detail="File not found")
+
+    file_size = stat_result.st_size
+    if etag is None:
+        etag = f'"{int(stat_result.st_mtime)}-{file_size}"'
+    if last_modified is None:
+        last_modified = datetime.fromtimestamp(stat_result.st_mtime, tz=timezone.utc)
+
+    headers = {
+        "ETag": etag,
+        "Last-Modified": format_http_date(last_modified),
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, max-age=0, must-revalidate"
+    }
+    if is_not_modified(request.headers, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+
+    headers["Content-Disposition"] = content_disposition(filename, inline)
+    byte_range = _requested_range(request, etag, file_size)
+    status_code = 200
+    if byte_range is None:
+        headers["Content-Length"] = str(file_size)
+    else:
+        start, end = byte_range
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{file_size}"
+        headers["Content-Length"] = str(end - start + 1)
+
+    return PathFileResponse(
+        path,
+        byte_range=byte_range,
+        status_code=status_code,
+        headers=headers,
+        media_type=media_type,
+        stat_result=stat_result,
+        method=request.method
+    )
+
+
+def _requested_range(request: Request, etag: str, file_size: int) -> Optional[Tuple[int, int]]:
+    """Return the requested byte range unless If-Range no longer matches"""
+    if_range = request.headers.get("if-range")
+    if if_range is not None and if_range != etag:
+        return None
+    return parse_range_header(request.headers.get("range"), file_size)
+
+
+async def content_exists(file_doc: Dict[str, Any]) -> bool:
+    """
+    Whether the file document points at stored content.
+
+    Check this before any header is sent: once a streaming response has
+    started, a missing GridFS object can only show up as a truncated 200.
+    """
+    if file_doc["storage_type"] == "gridfs":
+        if not file_doc.get("gridfs_file_id"):
+            return False
+        return await get_storage_backend("gridfs").stat(storage_ref(file_doc)) is not None
+    return bool(file_doc.get("file_path")) and os.path.exists(file_doc["file_path"])
+
+
+async def _ensure_content_exists(file_doc: Dict[str, Any]) -> None:
+    """Raise 404 when the file document does not point at stored content"""
+    if not await content_exists(file_doc):
+        raise HTTPException(status_code=404, detail="File content not found")
+
+
+def _validator_headers(file_doc: Dict[str, Any]) -> Dict[str, str]:
+    """Headers shared by every download response for a file"""
+    headers = {
+        "ETag": build_etag(file_doc),
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, max-age=0, must-revalidate"
+    }
+    last_modified = to_utc_datetime(file_doc.get("uploaded_at"))
+    if last_modified is not None:
+        headers["Last-Modified"] = format_http_date(last_modified)
+    return headers
+
+
+async def build_file_response(
+    request: Request,
+    file_doc: Dict[str, Any],
+    inline: bool = False
+) -> Response:
+    """
+    Build a streaming download response for a stored file.
+
+    Honors ``If-None-Match`` / ``If-Modified-Since`` (304) and single
+    ``Range`` requests (206), and never loads the whole file into memory.
+    Files quarantined by validation are refused with 409.
+    """
+    if is_quarantined(file_doc):
+        raise HTTPException(
+            status_code=409,
+            detail=f"File failed validation and is quarantined: {file_doc.get('quarantine_reason')}"
+        )
+    await _ensure_content_exists(file_doc)
+    headers = _validator_headers(file_doc)
+    last_modified = to_utc_datetime(file_doc.get("uploaded_at"))
+
+    if file_doc["storage_type"] == "filesystem":
+        # Hand local files to the server by path so it can use sendfile
+        return build_path_response(
+            request,
+            file_doc["file_path"],
+            file_doc["original_filename"],
+            media_type=file_doc.get("content_type"),
+            etag=headers["ETag"],
+            last_modified=last_modified,
+            inline=inline
+        )
+
+    if is_not_modified(request.headers, headers["ETag"], last_modified):
+        return Response(status_code=304, headers=headers)
+
+    file_size = file_doc.get("file_size", 0)
+    media_type = file_doc.get("content_type") or "application/pdf"
+    headers["Content-Disposition"] = content_disposition(file_doc["original_filename"], inline)
+
+    byte_range = _requested_range(request, headers["ETag"], file_size)
+
+    if byte_range is None:
+        headers["Content-Length"] = str(file_size)
+        return StreamingResponse(
+            iter_file_content(file_doc),
+            media_type=media_type,
+            headers=headers
+        )
+
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{file_size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        iter_file_content(file_doc, start, end),
+        status_code=206,
+        media_type=media_type,
+        headers=headers
+    )
+
@@ -1,11 +1,22 @@
 import os
 import uuid
+import asyncio
+import json
+import base64
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, AsyncIterator
 from fastapi import UploadFile, HTTPException
-from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError, BulkWriteError, ConnectionFailure
+from gridfs.errors import NoFile
 from app.services.mongodb import get_mongo_db
-import shutil
+from app.services.mongo_health import mongo_health
+from app.services.storage import StorageBackend, GridFSStorageBackend, LocalStorageBackend, DOWNLOAD_CHUNK_SIZE, to_gridfs_id
+from app.services.cache import TTLCache
+from app.services.content_cache import content_cache
+from app.utils.http_utils import build_etag
+from app.utils.pdf_utils import PdfStreamValidator, InvalidPDFError
 
 # Set the base path to "uploads" folder inside your project directory
 UPLOAD_DIR = os.path.join(os.getcwd(), "uploads")
@@ -13,11 +24,326 @@ UPLOAD_DIR = os.path.join(os.getcwd(), "uploads")
 # Allowed file types - only PDF
 ALLOWED_EXTENSIONS = {'.pdf'}
 
+local_storage = LocalStorageBackend(UPLOAD_DIR)
+
+# Rejected filesystem uploads are moved here, out of reach of /files/{filename}; same filesystem as UPLOAD_DIR
+QUARANTINE_DIR = os.environ.get("QUARANTINE_DIR", os.path.join(os.getcwd(), "quarantine"))
+
+quarantine_storage = LocalStorageBackend(QUARANTINE_DIR)
+
+# Maximum number of files from one batch upload written to storage at once
+UPLOAD_BATCH_CONCURRENCY = int(os.environ.get("UPLOAD_BATCH_CONCURRENCY", 4))
+
+# Page size cap and projected fields for document listings
+MAX_LIST_PAGE_SIZE = 500
+LIST_PROJECTION = {
+    "tender_id": 1,
+    "document_type": 1,
+    "original_filename": 1,
+    "stored_filename": 1,
+    "content_type": 1,
+    "file_size": 1,
+    "uploaded_at": 1,
+    "storage_type": 1,
+    "file_path": 1,
+    "status": 1
+}
+
+# Most files one batch delete may name
+MAX_BATCH_DELETE_SIZE = 500
+
+# Fields needed to release a file's stored content
+STORAGE_PROJECTION = {
+    "storage_type": 1,
+    "file_path": 1,
+    "gridfs_file_id": 1,
+    "content_addressed": 1,
+    "sha256": 1
+}
+
+# Formatted file documents keyed by file id, shared by every read path
+metadata_cache = TTLCache(
+    max_size=int(os.environ.get("FILE_METADATA_CACHE_SIZE", 2048)),
+    ttl_seconds=float(os.environ.get("FILE_METADATA_CACHE_TTL_SECONDS", 300))
+)
+
 def validate_file_type(filename: str) -> bool:
     """Validate that the file is a PDF"""
     file_extension = os.path.splitext(filename.lower())[1]
     return file_extension in ALLOWED_EXTENSIONS
 
+def get_storage_backend(storage_type: str) -> StorageBackend:
+    """Resolve the storage backend for a files-collection ``storage_type``"""
+    if storage_type == GridFSStorageBackend.storage_type:
+        return GridFSStorageBackend(get_mongo_db())
+    return local_storage
+
+def storage_ref(file_doc: Dict[str, Any]) -> Optional[str]:
+    """The backend reference (GridFS id or file path) recorded for a file"""
+    if file_doc["storage_type"] == GridFSStorageBackend.storage_type:
+        return file_doc.get("gridfs_file_id")
+    return file_doc.get("file_path")
+
+async def register_blob(
+    db: AsyncIOMotorDatabase,
+    backend: StorageBackend,
+    stored: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Map freshly uploaded GridFS content onto its content-addressed blob.
+
+    Blobs live in the ``blobs`` collection keyed by SHA-256 with a reference
+    count. If identical bytes are already stored, the new GridFS copy is
+    dropped and the existing object gains a reference instead.
+    """
+    sha256 = stored["sha256"]
+    while True:
+        blob = await db.blobs.find_one_and_update(
+            {"_id": sha256},
+            # last_referenced_at keeps the storage GC off blobs an upload is still registering
+            {"$inc": {"ref_count": 1}, "$set": {"last_referenced_at": datetime.utcnow()}},
+            return_document=ReturnDocument.AFTER
+        )
+        if blob:
+            await backend.delete(stored["ref"])
+            print(f"♻️  Reusing stored blob {sha256} ({blob['ref_count']} references)")
+            return {"gridfs_file_id": blob["gridfs_file_id"], "deduplicated": True}
+
+        try:
+            await db.blobs.insert_one({
+                "_id": sha256,
+                "gridfs_file_id": stored["ref"],
+                "file_size": stored["file_size"],
+                "ref_count": 1,
+                "created_at": datetime.utcnow()
+            })
+            return {"gridfs_file_id": stored["ref"], "deduplicated": False}
+        except DuplicateKeyError:
+            # An identical upload registered the blob first; take a reference to it
+            continue
+
+async def release_blob(
+    db: AsyncIOMotorDatabase,
+    backend: StorageBackend,
+    sha256: str
+) -> bool:
+    """
+    Drop one reference to a content-addressed blob.
+
+    The GridFS object is deleted only when the last reference goes.
+    Returns True if the underlying GridFS object was removed.
+    """
+    blob = await db.blobs.find_one_and_update(
+        {"_id": sha256},
+        {"$inc": {"ref_count": -1}},
+        return_document=ReturnDocument.AFTER
+    )
+    if not blob or blob["ref_count"] > 0:
+        return False
+
+    # Only remove the blob if no upload re-referenced it in the meantime
+    result = await db.blobs.delete_one({"_id": sha256, "ref_count": {"$lte": 0}})
+    if result.deleted_count:
+        await backend.delete(blob["gridfs_file_id"])
+        return True
+    return False
+
+async def delete_gridfs_objects(db: AsyncIOMotorDatabase, gridfs_ids: List[Any]) -> int:
+    """
+    Remove GridFS objects with two bulk deletes instead of one bucket delete each.
+
+    ``fs.files`` goes first so a crash in between leaves only chunks without
+    a file, which the storage GC reclaims. Returns the objects removed.
+    """
+    if not gridfs_ids:
+        return 0
+    ids = [to_gridfs_id(gridfs_id) for gridfs_id in gridfs_ids]
+    result = await db.fs.files.delete_many({"_id": {"$in": ids}})
+    await db.fs.chunks.delete_many({"files_id": {"$in": ids}})
+    return result.deleted_count
+
+async def release_blobs(db: AsyncIOMotorDatabase, references: Dict[str, int]) -> int:
+    """
+    Drop ``references[sha256]`` references from each of many blobs at once.
+
+    Like ``release_blob``, a blob's GridFS object is deleted only when its
+    last reference goes. Returns the GridFS objects removed.
+    """
+    if not references:
+        return 0
+    await db.blobs.bulk_write(
+        [UpdateOne({"_id": sha256}, {"$inc": {"ref_count": -count}}) for sha256, count in references.items()],
+        ordered=False
+    )
+    released = [
+        blob async for blob in db.blobs.find(
+            {"_id": {"$in": list(references)}, "ref_count": {"$lte": 0}},
+            {"gridfs_file_id": 1}
+        )
+    ]
+    if not released:
+        return 0
+    released_ids = [blob["_id"] for blob in released]
+    await db.blobs.delete_many({"_id": {"$in": released_ids}, "ref_count": {"$lte": 0}})
+    # A blob re-referenced between the find and the delete survives, and so does its content
+    survivors = {blob["_id"] async for blob in db.blobs.find({"_id": {"$in": released_ids}}, {"_id": 1})}
+    return await delete_gridfs_objects(
+        db, [blob["gridfs_file_id"] for blob in released if blob["_id"] not in survivors]
+    )
+
+def check_mongo_available() -> Optional[AsyncIOMotorDatabase]:
+    """
+    Return the database if the health monitor reports MongoDB up, otherwise None.
+
+    Uses the monitor's cached circuit state, so no round trip is made here.
+    """
+    if not mongo_health.is_available():
+        print("📝 MongoDB unavailable (circuit open) - using filesystem storage only")
+        return None
+    try:
+        return get_mongo_db()
+    except RuntimeError:
+        return None
+
+def build_file_metadata(
+    tender_id: str,
+    document_type: str,
+    original_filename: str,
+    content_type: Optional[str]
+) -> Dict[str, Any]:
+    """A new files-collection document; storage fields are filled in once the bytes are stored"""
+    file_id = str(uuid.uuid4())
+    return {
+        "_id": file_id,
+        "tender_id": tender_id,
+        "document_type": document_type,
+        "original_filename": original_filename,
+        # Prefixed with the id so re-uploading a name never replaces another record's file
+        "stored_filename": f"{file_id}_{tender_id}_{document_type}_{original_filename}",
+        "content_type": content_type,
+        "file_size": 0,  # Will be updated after saving
+        "sha256": None,  # Computed while streaming the upload
+        "uploaded_at": datetime.utcnow(),
+        "storage_type": "filesystem",  # Default to filesystem
+        "file_path": None,  # Will be set for filesystem storage
+        "gridfs_file_id": None,  # Will be set for GridFS storage
+        "content_addressed": False,  # GridFS content shared through the blobs collection
+        "status": "uploaded",
+        "processed_at": None  # Set by the processing pipeline; absent on files stored before it existed
+    }
+
+def is_quarantined(file_doc: Dict[str, Any]) -> bool:
+    """Rejected by validation: kept for inspection, but no longer listed or served"""
+    return bool(file_doc.get("quarantined"))
+
+async def quarantine_file(file_doc: Dict[str, Any], reason: str) -> None:
+    """
+    Mark a file that failed validation as quarantined.
+
+    A filesystem upload is also moved out of UPLOAD_DIR, which is served by
+    filename without a metadata lookup. GridFS content is only reachable
+    by file id, where the quarantine check applies.
+    """
+    fields: Dict[str, Any] = {"quarantined": True, "quarantine_reason": reason}
+    file_path = None
+    if file_doc.get("storage_type") == "filesystem" and file_doc.get("file_path"):
+        name = os.path.basename(file_doc["file_path"])
+        if not name.startswith(file_doc["_id"]):
+            # Stored before names carried the file id
+            name = f"{file_doc['_id']}_{name}"
+        file_path = await quarantine_storage.adopt(name, file_doc["file_path"])
+        fields["file_path"] = file_path
+    result = await get_mongo_db().files.update_one({"_id": file_doc["_id"]}, {"$set": fields})
+    metadata_cache.invalidate(file_doc["_id"])
+    if not result.matched_count:
+        if file_path:
+            # Deleted meanwhile; its delete looked for the old path
+            await quarantine_storage.delete(file_path)
+        return
+    file_doc.update(fields)
+
+async def store_upload(
+    upload_file: UploadFile,
+    tender_id: str,
+    document_type: str,
+    store_in_gridfs: bool,
+    db: Optional[AsyncIOMotorDatabase]
+) -> Dict[str, Any]:
+    """
+    Persist the bytes of one upload and build its files-collection document.
+
+    The metadata is returned rather than inserted so callers can insert a
+    single document or a whole batch. Returns ``file_metadata`` and
+    ``deduplicated``. Raises ``InvalidPDFError`` as soon as the streamed
+    content turns out not to be a complete PDF; nothing is kept in that case.
+    """
+    file_metadata = build_file_metadata(tender_id, document_type, upload_file.filename, upload_file.content_type)
+    filename = file_metadata["stored_filename"]
+    deduplicated = False
+    
+    storage_metadata = {
+        "tender_id": tender_id,
+        "document_type": document_type,
+        "original_filename": upload_file.filename
+    }
+    
+    stored = None
+    if db is not None and store_in_gridfs:
+        try:
+            # Stream file content into GridFS chunk by chunk
+            backend = get_storage_backend("gridfs")
+            stored = await backend.put(filename, PdfStreamValidator(upload_file), storage_metadata)
+            blob = await register_blob(db, backend, stored)
+            deduplicated = blob["deduplicated"]
+            file_metadata["gridfs_file_id"] = blob["gridfs_file_id"]
+            file_metadata["content_addressed"] = True
+            file_metadata["storage_type"] = "gridfs"
+        except ConnectionFailure as e:
+            # Trip the breaker and fail over to the filesystem for this upload
+            mongo_health.record_failure(e)
+            print(f"⚠️  GridFS write failed, falling back to filesystem: {e}")
+            await upload_file.seek(0)
+            stored = None
+    
+    if stored is None:
+        # Store file on filesystem (backward compatibility)
+        backend = get_storage_backend("filesystem")
+        stored = await backend.put(filename, PdfStreamValidator(upload_file), storage_metadata)
+        file_metadata["file_path"] = stored["ref"]
+    
+    file_metadata["file_size"] = stored["file_size"]
+    file_metadata["sha256"] = stored["sha256"]
+    return {"file_metadata": file_metadata, "deduplicated": deduplicated}
+
+async def discard_stored_upload(db: AsyncIOMotorDatabase, file_metadata: Dict[str, Any]) -> None:
+    """Undo store_upload for a file whose metadata could not be saved"""
+    try:
+        backend = get_storage_backend(file_metadata["storage_type"])
+        if file_metadata["content_addressed"]:
+            await release_blob(db, backend, file_metadata["sha256"])
+        elif file_metadata["storage_type"] == "gridfs":
+            await backend.delete(file_metadata["gridfs_file_id"])
+    except Exception as release_error:
+        print(f"⚠️  Failed to release stored content: {release_error}")
+
+def upload_result(stored: Dict[str, Any], mongo_available: bool) -> Dict[str, Any]:
+    """Shape a stored upload into the API response for one file"""
+    file_metadata = stored["file_metadata"]
+    return {
+        "file_id": file_metadata["_id"],
+        "tender_id": file_metadata["tender_id"],
+        "document_type": file_metadata["document_type"],
+        "filename": file_metadata["original_filename"],
+        "stored_filename": file_metadata["stored_filename"],
+        "file_size": file_metadata["file_size"],
+        "sha256": file_metadata["sha256"],
+        "uploaded_at": file_metadata["uploaded_at"].isoformat(),
+        "storage_type": file_metadata["storage_type"],
+        "deduplicated": stored["deduplicated"],
+        "status": "success",
+        "mongo_available": mongo_available
+    }
+
 async def save_file_to_mongodb(
     upload_file: UploadFile, 
     tender_id: str, 
@@ -35,113 +361,149 @@ async def save_file_to_mongodb(
         )
     
     # Check MongoDB availability
-    mongo_available = False
-    try:
-        db = get_mongo_db()
-        # Test the connection
-        await db.command("ping")
-        mongo_available = True
-        print("✅ MongoDB is available for file operations")
-    except Exception as e:
-        mongo_available = False
-        print(f"⚠️  MongoDB not available: {e}")
-        print("📝 Using filesystem storage only")
+    db = check_mongo_available()
+    mongo_available = db is not None
     
-    # Generate unique file ID
-    file_id = str(uuid.uuid4())
-    
-    # Create filename for storage
-    filename = f"{tender_id}_{document_type}_{upload_file.filename}"
-    
-    # File metadata
-    file_metadata = {
-        "_id": file_id,
-        "tender_id": tender_id,
-        "document_type": document_type,
-        "original_filename": upload_file.filename,
-        "stored_filename": filename,
-        "content_type": upload_file.content_type,
-        "file_size": 0,  # Will be updated after saving
-        "uploaded_at": datetime.utcnow(),
-        "storage_type": "filesystem",  # Default to filesystem
-        "file_path": None,  # Will be set for filesystem storage
-        "gridfs_file_id": None,  # Will be set for GridFS storage
-        "status": "uploaded"
-    }
-    
-    if mongo_available and store_in_gridfs:
-        # Store file content in GridFS
-        fs = AsyncIOMotorGridFSBucket(db)
-        
-        # Read file content
-        file_content = await upload_file.read()
-        file_metadata["file_size"] = len(file_content)
-        
-        # Store in GridFS
-        gridfs_file_id = await fs.upload_from_stream(
-            filename,
-            file_content,
-            metadata={
-                "tender_id": tender_id,
-                "document_type": document_type,
-                "original_filename": upload_file.filename
-            }
-        )
-        file_metadata["gridfs_file_id"] = str(gridfs_file_id)
-        file_metadata["storage_type"] = "gridfs"
-        
-    else:
-        # Store file on filesystem (backward compatibility)
-        os.makedirs(UPLOAD_DIR, exist_ok=True)
-        file_path = os.path.join(UPLOAD_DIR, filename)
-        
-        # Save file to filesystem
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(upload_file.file, buffer)
-        
-        # Get file size
-        file_size = os.path.getsize(file_path)
-        file_metadata["file_size"] = file_size
-        file_metadata["file_path"] = file_path
+    try:
+        stored = await store_upload(upload_file, tender_id, document_type, store_in_gridfs, db)
+    except InvalidPDFError as e:
+        raise HTTPException(status_code=400, detail=f"{upload_file.filename}: {e}")
+    file_metadata = stored["file_metadata"]
+    file_id = file_metadata["_id"]
     
     # Save metadata to MongoDB if available
     if mongo_available:
         try:
             result = await db.files.insert_one(file_metadata)
+            metadata_cache.invalidate(file_id)
             print(f"✅ File metadata saved to MongoDB: {file_id}")
         except Exception as e:
             print(f"⚠️  Failed to save metadata to MongoDB: {e}")
+            if isinstance(e, ConnectionFailure):
+                mongo_health.record_failure(e)
+            await discard_stored_upload(db, file_metadata)
+            # The content was released, so reporting success would hand back an id with no record
+            raise HTTPException(status_code=500, detail=f"Failed to save file metadata: {e}")
     
-    return {
-        "file_id": file_id,
-        "tender_id": tender_id,
-        "document_type": document_type,
-        "filename": upload_file.filename,
-        "stored_filename": filename,
-        "file_size": file_metadata["file_size"],
-        "uploaded_at": file_metadata["uploaded_at"].isoformat(),
-        "storage_type": file_metadata["storage_type"],
-        "status": "success",
-        "mongo_available": mongo_available
-    }
+    return upload_result(stored, mongo_available)
+
+async def save_files_to_mongodb(
+    upload_files: List[UploadFile],
+    tender_id: str,
+    document_type: str,
+    store_in_gridfs: bool = True,
+    concurrency: int = UPLOAD_BATCH_CONCURRENCY
+) -> List[Dict[str, Any]]:
+    """
+    Save a batch of uploads for one tender.
+
+    MongoDB is checked once for the whole batch, at most ``concurrency``
+    files are written to storage at a time, and all metadata is saved with
+    a single insert_many. Returns one result per file, in request order;
+    a failed file does not fail the batch.
+    """
+    db = check_mongo_available()
+    mongo_available = db is not None
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def store_one(upload_file: UploadFile) -> Dict[str, Any]:
+        if not validate_file_type(upload_file.filename):
+            raise ValueError(f"Only PDF files are allowed. Received: {upload_file.filename}")
+        async with semaphore:
+            return await store_upload(upload_file, tender_id, document_type, store_in_gridfs, db)
+
+    outcomes = await asyncio.gather(
+        *(store_one(upload_file) for upload_file in upload_files),
+        return_exceptions=True
+    )
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(upload_files)
+    stored_batch = []
+    for index, outcome in enumerate(outcomes):
+        if isinstance(outcome, BaseException):
+            results[index] = {
+                "filename": upload_files[index].filename,
+                "status": "failed",
+                "error": str(outcome)
+            }
+        else:
+            stored_batch.append((index, outcome))
+
+    failed_inserts: Dict[int, str] = {}
+    if mongo_available and stored_batch:
+        try:
+            await db.files.insert_many(
+                [stored["file_metadata"] for _, stored in stored_batch],
+                ordered=False
+            )
+            print(f"✅ {len(stored_batch)} file metadata records saved to MongoDB")
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                failed_inserts[error["index"]] = error.get("errmsg", "Failed to save metadata")
+        except Exception as e:
+            print(f"⚠️  Failed to save batch metadata to MongoDB: {e}")
+            if isinstance(e, ConnectionFailure):
+                mongo_health.record_failure(e)
+            failed_inserts = {position: str(e) for position in range(len(stored_batch))}
+
+    for position, (index, stored) in enumerate(stored_batch):
+        metadata_cache.invalidate(stored["file_metadata"]["_id"])
+        if position in failed_inserts:
+            await discard_stored_upload(db, stored["file_metadata"])
+            results[index] = {
+                "filename": upload_files[index].filename,
+                "status": "failed",
+                "error": failed_inserts[position]
+            }
+        else:
+            results[index] = upload_result(stored, mongo_available)
+
+    return results
 
 async def get_file_metadata(file_id: str) -> Optional[Dict[str, Any]]:
-    """Get file metadata from MongoDB"""
+    """Get file metadata, served from the in-process cache when possible"""
+    cached = metadata_cache.get(file_id)
+    if cached is not None:
+        return dict(cached)
     try:
         db = get_mongo_db()
+        version = metadata_cache.version()
         file_doc = await db.files.find_one({"_id": file_id})
         if file_doc:
             file_doc["uploaded_at"] = file_doc["uploaded_at"].isoformat()
+            metadata_cache.set(file_id, dict(file_doc), version)
         return file_doc
     except RuntimeError:
         print("⚠️  MongoDB not available for metadata retrieval")
         return None
 
+async def get_files_metadata(file_ids: List[str]) -> List[Dict[str, Any]]:
+    """Get metadata for several files in one round trip, preserving the requested order"""
+    found = {}
+    for file_id in file_ids:
+        cached = metadata_cache.get(file_id)
+        if cached is not None:
+            found[file_id] = dict(cached)
+    missing = [file_id for file_id in file_ids if file_id not in found]
+    try:
+        if missing:
+            db = get_mongo_db()
+            version = metadata_cache.version()
+            cursor = db.files.find({"_id": {"$in": missing}})
+            async for file_doc in cursor:
+                file_doc["uploaded_at"] = file_doc["uploaded_at"].isoformat()
+                metadata_cache.set(file_doc["_id"], dict(file_doc), version)
+                found[file_doc["_id"]] = file_doc
+        return [found[file_id] for file_id in file_ids if file_id in found]
+    except RuntimeError:
+        print("⚠️  MongoDB not available for metadata retrieval")
+        return []
+
 async def list_files_by_tender(tender_id: str) -> List[Dict[str, Any]]:
     """List all files for a specific tender"""
     try:
         db = get_mongo_db()
-        cursor = db.files.find({"tender_id": tender_id}).sort("uploaded_at", -1)
+        cursor = db.files.find({"tender_id": tender_id, "quarantined": {"$ne": True}}).sort("uploaded_at", -1)
         files = []
         async for file_doc in cursor:
             file_doc["uploaded_at"] = file_doc["uploaded_at"].isoformat()
@@ -165,45 +527,189 @@ async def list_all_files() -> List[Dict[str, Any]]:
         print("⚠️  MongoDB not available for file listing")
         return []
 
+def encode_list_cursor(file_doc: Dict[str, Any]) -> str:
+    """Opaque cursor pointing just after ``file_doc`` in (uploaded_at, _id) order"""
+    position = [file_doc["uploaded_at"].isoformat(), file_doc["_id"]]
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+def decode_list_cursor(cursor: str) -> Dict[str, Any]:
+    """Turn a cursor back into a keyset filter; raises 400 if it is malformed"""
+    try:
+        uploaded_at, file_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        uploaded_at = datetime.fromisoformat(uploaded_at)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {
+        "$or": [
+            {"uploaded_at": {"$lt": uploaded_at}},
+            {"uploaded_at": uploaded_at, "_id": {"$lt": file_id}}
+        ]
+    }
+
+async def list_files_page(
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    tender_id: Optional[str] = None,
+    document_type: Optional[str] = None,
+    include_quarantined: bool = False
+) -> Dict[str, Any]:
+    """
+    List files newest first using keyset pagination on (uploaded_at, _id).
+
+    Returns one page of projected file documents and the cursor for the next
+    page (None on the last page). Files quarantined by validation are left
+    out unless ``include_quarantined`` is set.
+    """
+    limit = max(1, min(limit, MAX_LIST_PAGE_SIZE))
+    query: Dict[str, Any] = {}
+    if not include_quarantined:
+        query["quarantined"] = {"$ne": True}
+    if tender_id:
+        query["tender_id"] = tender_id
+    if document_type:
+        query["document_type"] = document_type
+    if cursor:
+        query.update(decode_list_cursor(cursor))
+
+    try:
+        db = get_mongo_db()
+        # Fetch one extra document to learn whether another page exists
+        results = db.files.find(query, LIST_PROJECTION).sort(
+            [("uploaded_at", -1), ("_id", -1)]
+        ).limit(limit + 1)
+        files = [file_doc async for file_doc in results]
+    except RuntimeError:
+        print("⚠️  MongoDB not available for file listing")
+        return {"documents": [], "next_cursor": None}
+
+    next_cursor = encode_list_cursor(files[limit - 1]) if len(files) > limit else None
+    files = files[:limit]
+    for file_doc in files:
+        file_doc["uploaded_at"] = file_doc["uploaded_at"].isoformat()
+    return {"documents": files, "next_cursor": next_cursor}
+
 async def delete_file(file_id: str) -> bool:
     """Delete file from MongoDB and storage"""
+    result = await delete_files([file_id])
+    return bool(result["deleted"])
+
+async def delete_files(file_ids: List[str]) -> Dict[str, List[str]]:
+    """
+    Delete many files with a fixed number of bulk operations.
+
+    The records are first claimed with a ``deleting`` token, so two
+    concurrent deletes never release the same content twice. The
+    metadata is then deleted before the content it points at. A crash
+    part way through therefore leaves unreferenced content or claimed
+    records, and the storage GC finishes both off. A crash never leaves
+    records pointing at content that is gone.
+    """
     db = get_mongo_db()
-    
-    # Get file metadata
-    file_doc = await db.files.find_one({"_id": file_id})
-    if not file_doc:
-        return False
-    
-    # Delete from storage
-    if file_doc["storage_type"] == "gridfs":
-        # Delete from GridFS
-        fs = AsyncIOMotorGridFSBucket(db)
-        await fs.delete(file_doc["gridfs_file_id"])
-    else:
-        # Delete from filesystem
-        if file_doc.get("file_path") and os.path.exists(file_doc["file_path"]):
-            os.remove(file_doc["file_path"])
-    
-    # Delete metadata from MongoDB
-    await db.files.delete_one({"_id": file_id})
-    return True
+    file_ids = list(dict.fromkeys(file_ids))
+    token = str(uuid.uuid4())
+    await db.files.update_many(
+        {"_id": {"$in": file_ids}, "deleting": {"$exists": False}},
+        {"$set": {"deleting": token, "deleting_at": datetime.utcnow()}}
+    )
+    deleted = await delete_claimed_files(db, token)
+    deleted_set = set(deleted)
+    return {"deleted": deleted, "not_found": [file_id for file_id in file_ids if file_id not in deleted_set]}
+
+async def delete_claimed_files(db: AsyncIOMotorDatabase, token: str) -> List[str]:
+    """Delete the records claimed with ``token`` and release their stored content"""
+    file_docs = [file_doc async for file_doc in db.files.find({"deleting": token}, STORAGE_PROJECTION)]
+    if not file_docs:
+        return []
+    await db.files.delete_many({"deleting": token})
+
+    references: Dict[str, int] = {}
+    gridfs_ids = []
+    paths = []
+    for file_doc in file_docs:
+        if file_doc.get("content_addressed"):
+            # Shared blob: only dropped when the last reference goes
+            references[file_doc["sha256"]] = references.get(file_doc["sha256"], 0) + 1
+        elif file_doc["storage_type"] == GridFSStorageBackend.storage_type:
+            if file_doc.get("gridfs_file_id"):
+                gridfs_ids.append(file_doc["gridfs_file_id"])
+        elif file_doc.get("file_path"):
+            paths.append(file_doc["file_path"])
+    await release_blobs(db, references)
+    await delete_gridfs_objects(db, gridfs_ids)
+    await asyncio.gather(*(local_storage.delete(path) for path in paths))
+
+    file_ids = [file_doc["_id"] for file_doc in file_docs]
+    for file_id in file_ids:
+        metadata_cache.invalidate(file_id)
+        await content_cache.invalidate(file_id)
+    return file_ids
 
 async def get_file_content(file_id: str) -> Optional[bytes]:
     """Get file content from storage"""
     file_doc = await get_file_metadata(file_id)
-    if not file_doc:
+    if not file_doc or not storage_ref(file_doc):
         return None
     
-    if file_doc["storage_type"] == "gridfs":
-        # Get from GridFS
-        db = get_mongo_db()
-        fs = AsyncIOMotorGridFSBucket(db)
-        gridfs_out = await fs.open_download_stream(file_doc["gridfs_file_id"])
-        return await gridfs_out.read()
-    else:
-        # Get from filesystem
-        if file_doc.get("file_path") and os.path.exists(file_doc["file_path"]):
-            with open(file_doc["file_path"], "rb") as f:
-                return f.read()
-    
-    return None 
\ No newline at end of file
+    try:
+        return b"".join([chunk async for chunk in iter_file_content(file_doc)])
+    except (NoFile, FileNotFoundError):
+        return None
+
+def iter_file_content(
+    file_doc: Dict[str, Any],
+    start: int = 0,
+    end: Optional[int] = None
+) -> AsyncIterator[bytes]:
+    """
+    Stream the bytes of a stored file between ``start`` and ``end`` (inclusive).
+
+    Content is read from the file's storage backend in DOWNLOAD_CHUNK_SIZE
+    blocks, so memory stays bounded regardless of the file size. GridFS
+    files small enough for the content cache are served from it when hot.
+    """
+    if end is None:
+        end = file_doc.get("file_size", 0) - 1
+    if file_doc["storage_type"] == "gridfs" and content_cache.accepts(file_doc.get("file_size", 0)):
+        return _iter_cached_content(file_doc, start, end)
+    backend = get_storage_backend(file_doc["storage_type"])
+    return backend.open_stream(storage_ref(file_doc), start, end)
+
+async def _iter_cached_content(file_doc: Dict[str, Any], start: int, end: int) -> AsyncIterator[bytes]:
+    """Serve from the content cache, or read through GridFS and populate it"""
+    file_id = file_doc["_id"]
+    etag = build_etag(file_doc)
+
+    cached = content_cache.get_memory(file_id, etag)
+    if cached is not None:
+        for offset in range(start, end + 1, DOWNLOAD_CHUNK_SIZE):
+            yield cached[offset:min(offset + DOWNLOAD_CHUNK_SIZE, end + 1)]
+        return
+
+    cached_path = content_cache.get_disk_path(file_id, etag)
+    if cached_path is not None:
+        served = False
+        try:
+            async for chunk in local_storage.open_stream(cached_path, start, end):
+                served = True
+                yield chunk
+            return
+        except FileNotFoundError:
+            # Evicted between the lookup and the open; read from storage instead
+            if served:
+                raise
+
+    content_cache.record_miss()
+    backend = get_storage_backend(file_doc["storage_type"])
+    if start != 0 or end != file_doc["file_size"] - 1:
+        # Partial reads are not cached; the next full download will populate the entry
+        async for chunk in backend.open_stream(storage_ref(file_doc), start, end):
+            yield chunk
+        return
+
+    chunks = []
+    async for chunk in backend.open_stream(storage_ref(file_doc)):
+        chunks.append(chunk)
+        yield chunk
+    content = b"".join(chunks)
+    if len(content) == file_doc["file_size"]:
+        await content_cache.put(file_id, etag, content)
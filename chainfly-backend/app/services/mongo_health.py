@@ -0,0 +1,255 @@
+import os
+import time
+import asyncio
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Optional, Dict, Any, Awaitable, Callable, List, Set
+from app.services import mongodb
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class BackgroundProbe(ABC):
+    """Runs ``probe()`` every ``interval_seconds`` on a background task"""
+
+    interval_seconds: float
+    _task: Optional[asyncio.Task] = None
+
+    @abstractmethod
+    async def probe(self) -> bool:
+        """Do one round of the background work; returns whether it succeeded"""
+
+    async def _run(self) -> None:
+        while True:
+            await self.probe()
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+class MongoHealthMonitor(BackgroundProbe):
+    """
+    Background MongoDB health probe with a circuit breaker.
+
+    A task pings MongoDB every ``interval_seconds`` and keeps the result in
+    memory, so hot paths can ask ``is_available()`` without a round trip.
+    ``failure_threshold`` consecutive failures (from the probe or reported
+    by callers) open the circuit and traffic fails over to the filesystem
+    at once. After ``recovery_seconds`` the circuit goes half-open and the
+    next successful probe closes it again, which runs the callbacks added
+    with ``on_recovery()``.
+    """
+
+    def __init__(
+        self,
+        interval_seconds: float,
+        probe_timeout_seconds: float,
+        failure_threshold: int,
+        recovery_seconds: float
+    ):
+        self.interval_seconds = interval_seconds
+        self.probe_timeout_seconds = probe_timeout_seconds
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        self.state = OPEN
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = time.monotonic()
+        self.last_success_at: Optional[datetime] = None
+        self.last_failure_at: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+        self.last_latency_ms: Optional[float] = None
+        self._recovery_callbacks: List[Callable[[], Awaitable[Any]]] = []
+        self._recovery_tasks: Set[asyncio.Task] = set()
+
+    def on_recovery(self, callback: Callable[[], Awaitable[Any]]) -> None:
+        """Run ``callback()`` on a background task every time the circuit closes again"""
+        self._recovery_callbacks.append(callback)
+
+    async def _run_recovery_callback(self, callback: Callable[[], Awaitable[Any]]) -> None:
+        try:
+            await callback()
+        except Exception as e:
+            print(f"⚠️  MongoDB recovery task failed: {e}")
+
+    def _recovered(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        for callback in self._recovery_callbacks:
+            task = loop.create_task(self._run_recovery_callback(callback))
+            self._recovery_tasks.add(task)
+            task.add_done_callback(self._recovery_tasks.discard)
+
+    def is_available(self) -> bool:
+        """Cached view of whether MongoDB should be used (no network I/O)"""
+        if self.state == OPEN and self.opened_at is not None:
+            if time.monotonic() - self.opened_at >= self.recovery_seconds and mongodb.mongo_db is not None:
+                self.state = HALF_OPEN
+        return self.state != OPEN and mongodb.mongo_db is not None
+
+    def record_success(self, latency_ms: Optional[float] = None) -> None:
+        recovered = self.state != CLOSED
+        if recovered:
+            print("✅ MongoDB circuit closed - MongoDB is available again")
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.last_success_at = datetime.utcnow()
+        if latency_ms is not None:
+            self.last_latency_ms = latency_ms
+        if recovered:
+            self._recovered()
+
+    def record_failure(self, error: Exception) -> None:
+        self.consecutive_failures += 1
+        self.last_failure_at = datetime.utcnow()
+        self.last_error = f"{type(error).__name__}: {error}"
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != OPEN:
+                print(f"⚠️  MongoDB circuit opened - failing over to filesystem: {self.last_error}")
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+
+    async def probe(self) -> bool:
+        """Ping MongoDB once (reconnecting if startup never connected) and record the outcome"""
+        started = time.monotonic()
+        try:
+            if mongodb.mongo_client is None:
+                await mongodb.connect_to_mongo()
+                if mongodb.mongo_client is None:
+                    raise RuntimeError("MongoDB client not initialized")
+            await asyncio.wait_for(mongodb.ping_mongo(), timeout=self.probe_timeout_seconds)
+        except Exception as e:
+            self.record_failure(e)
+            return False
+        self.record_success((time.monotonic() - started) * 1000)
+        return True
+
+    async def stop(self) -> None:
+        await super().stop()
+        for task in list(self._recovery_tasks):
+            task.cancel()
+        self._recovery_tasks.clear()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "mongo_available": self.is_available(),
+            "circuit_state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "last_success_at": self.last_success_at.isoformat() if self.last_success_at else None,
+            "last_failure_at": self.last_failure_at.isoformat() if self.last_failure_at else None,
+            "last_error": self.last_error,
+            "last_latency_ms": round(self.last_latency_ms, 2) if self.last_latency_ms is not None else None,
+            "probe_interval_seconds": self.interval_seconds
+        }
+
+
+class GridFSHealthProbe(BackgroundProbe):
+    """
+    Cached GridFS health check.
+
+    The background probe only reads one ``fs.files`` id, so load balancers
+    can poll the cached result as often as they like without GridFS churn.
+    ``deep_check()`` keeps the old write/read/delete round trip for operators.
+    """
+
+    def __init__(self, interval_seconds: float, probe_timeout_seconds: float, monitor: MongoHealthMonitor):
+        self.interval_seconds = interval_seconds
+        self.probe_timeout_seconds = probe_timeout_seconds
+        self.monitor = monitor
+        self.gridfs_available = False
+        self.last_checked_at: Optional[datetime] = None
+        self.last_success_at: Optional[datetime] = None
+        self.last_deep_success_at: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+        self.last_latency_ms: Optional[float] = None
+
+    def _record(self, ok: bool, started: float, error: Optional[Exception] = None) -> None:
+        self.gridfs_available = ok
+        self.last_checked_at = datetime.utcnow()
+        self.last_latency_ms = (time.monotonic() - started) * 1000
+        if ok:
+            self.last_success_at = self.last_checked_at
+            self.last_error = None
+        else:
+            self.last_error = f"{type(error).__name__}: {error}"
+
+    async def probe(self) -> bool:
+        started = time.monotonic()
+        if not self.monitor.is_available():
+            self._record(False, started, RuntimeError("MongoDB is unavailable"))
+            return False
+        try:
+            await asyncio.wait_for(
+                mongodb.get_mongo_db().fs.files.find_one({}, {"_id": 1}),
+                timeout=self.probe_timeout_seconds
+            )
+        except Exception as e:
+            self._record(False, started, e)
+            return False
+        self._record(True, started)
+        return True
+
+    async def deep_check(self) -> Dict[str, Any]:
+        """Upload, download, verify and delete a small test file"""
+        from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+
+        started = time.monotonic()
+        fs = AsyncIOMotorGridFSBucket(mongodb.get_mongo_db())
+        test_content = b"GridFS test file"
+        test_filename = f"test_{datetime.utcnow().isoformat()}.txt"
+        file_id = await fs.upload_from_stream(test_filename, test_content, metadata={"test": True})
+        try:
+            download_stream = await fs.open_download_stream(file_id)
+            downloaded_content = await download_stream.read()
+        finally:
+            await fs.delete(file_id)
+        if downloaded_content != test_content:
+            raise RuntimeError("GridFS test file content did not match")
+        self._record(True, started)
+        self.last_deep_success_at = self.last_checked_at
+        return {
+            "test_file_upload": "success",
+            "test_file_download": "success",
+            "test_file_cleanup": "success",
+            "latency_ms": round(self.last_latency_ms, 2)
+        }
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "gridfs_available": self.gridfs_available,
+            "last_checked_at": self.last_checked_at.isoformat() if self.last_checked_at else None,
+            "last_success_at": self.last_success_at.isoformat() if self.last_success_at else None,
+            "last_deep_success_at": self.last_deep_success_at.isoformat() if self.last_deep_success_at else None,
+            "last_error": self.last_error,
+            "last_latency_ms": round(self.last_latency_ms, 2) if self.last_latency_ms is not None else None,
+            "probe_interval_seconds": self.interval_seconds
+        }
+
+
+mongo_health = MongoHealthMonitor(
+    interval_seconds=float(os.environ.get("MONGO_HEALTH_INTERVAL_SECONDS", 5)),
+    probe_timeout_seconds=float(os.environ.get("MONGO_HEALTH_PROBE_TIMEOUT_SECONDS", 2)),
+    failure_threshold=int(os.environ.get("MONGO_CIRCUIT_FAILURE_THRESHOLD", 2)),
+    recovery_seconds=float(os.environ.get("MONGO_CIRCUIT_RECOVERY_SECONDS", 15))
+)
+
+gridfs_health = GridFSHealthProbe(
+    interval_seconds=float(os.environ.get("GRIDFS_HEALTH_INTERVAL_SECONDS", 30)),
+    probe_timeout_seconds=float(os.environ.get("GRIDFS_HEALTH_PROBE_TIMEOUT_SECONDS", 2)),
+    monitor=mongo_health
+)
@@ -1,6 +1,7 @@
 from typing import Optional
 import os
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING, IndexModel
 
 mongo_client: Optional[AsyncIOMotorClient] = None
 mongo_db: Optional[AsyncIOMotorDatabase] = None
@@ -61,6 +62,8 @@ async def connect_to_mongo() -> None:
 		# Test database access
 		await mongo_db.command("ping")
 		
+		await ensure_indexes(mongo_db)
+		
 		print(f"✅ MongoDB connected successfully!")
 		print(f"📊 Database: {db_name}")
 		print(f"🔗 Connection pool: {mongo_client.max_pool_size} max connections")
@@ -73,6 +76,42 @@ async def connect_to_mongo() -> None:
 		mongo_db = None
 
 
+async def ensure_indexes(db: AsyncIOMotorDatabase) -> None:
+	"""Create the indexes the hot queries rely on (no-op when they already exist)"""
+	try:
+		# Keyset pagination over (uploaded_at, _id), optionally filtered by tender or type
+		await db.files.create_indexes([
+			IndexModel([("uploaded_at", DESCENDING), ("_id", DESCENDING)], name="uploaded_at_id"),
+			IndexModel(
+				[("tender_id", ASCENDING), ("uploaded_at", DESCENDING), ("_id", DESCENDING)],
+				name="tender_uploaded_at_id"
+			),
+			IndexModel(
+				[("document_type", ASCENDING), ("uploaded_at", DESCENDING), ("_id", DESCENDING)],
+				name="type_uploaded_at_id"
+			),
+			# Storage GC matches files under uploads/ to their records by name
+			IndexModel([("stored_filename", ASCENDING)], name="stored_filename"),
+		])
+		# Imports upsert on the portal tender number; listing is keyset on (created_at, _id)
+		await db.tenders.create_indexes([
+			IndexModel(
+				[("tender_number", ASCENDING)],
+				name="tender_number_unique",
+				unique=True,
+				partialFilterExpression={"tender_number": {"$type": "string"}}
+			),
+			IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)], name="created_at_id"),
+		])
+		# Extracted PDF text is replaced and deleted per file
+		await db.document_pages.create_index([("file_id", ASCENDING)], name="file_id")
+		# Abandoned resumable uploads are swept by expiry
+		await db.upload_sessions.create_index([("expires_at", ASCENDING)], name="expires_at")
+		print("✅ MongoDB indexes ensured")
+	except Exception as e:
+		print(f"⚠️  Failed to create MongoDB indexes: {e}")
+
+
 async def close_mongo_connection() -> None:
 	global mongo_client, mongo_db
 	if mongo_client is not None:
@@ -0,0 +1,361 @@
+import os
+import time
+import asyncio
+import tempfile
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Any, Callable, Awaitable
+import aiofiles
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+from app.services.mongodb import get_mongo_db
+from app.services.file_service import get_storage_backend, storage_ref, metadata_cache, quarantine_file
+from app.services.storage import LocalStorageBackend
+from app.utils.pdf_utils import inspect_pdf, InvalidPDFError
+
+# Files processed at once, and threads available for their blocking work
+PROCESSING_WORKERS = int(os.environ.get("PROCESSING_WORKERS", 2))
+
+# Worker processes for CPU-heavy parsing that must not hold the GIL in the server process
+PROCESSING_PROCESSES = int(os.environ.get("PROCESSING_PROCESSES", 2))
+
+# Status values of the files collection
+STATUS_UPLOADED = "uploaded"
+STATUS_PROCESSING = "processing"
+STATUS_PROCESSED = "processed"
+STATUS_FAILED = "failed"
+
+# A "processing" record older than this at startup was left behind by a worker that died
+PROCESSING_STALE_SECONDS = int(os.environ.get("PROCESSING_STALE_SECONDS", 1800))
+
+# Files stored before the pipeline existed are "uploaded" too; queue them at startup only on request
+PROCESSING_BACKFILL = os.environ.get("PROCESSING_BACKFILL", "false").lower() == "true"
+
+# Runs a file gets before a failing processor marks it "failed"; quarantined files are never retried
+PROCESSING_MAX_ATTEMPTS = int(os.environ.get("PROCESSING_MAX_ATTEMPTS", 3))
+
+# Delay before the first retry; doubles with every further attempt
+PROCESSING_RETRY_DELAY_SECONDS = float(os.environ.get("PROCESSING_RETRY_DELAY_SECONDS", 60))
+
+# Where content held outside the local filesystem is spooled for processors (default: system temp dir)
+PROCESSING_SPOOL_DIR = os.environ.get("PROCESSING_SPOOL_DIR") or None
+
+
+class ProcessingContext:
+    """
+    What a processor gets: the file document and a local path to its content.
+
+    Filesystem-stored files are read in place. Other backends are streamed
+    once into a temporary file, straight from storage rather than through
+    the content cache, so a large PDF is never held in memory and does not
+    evict the files that downloads are actually hitting.
+    """
+
+    def __init__(self, file_doc: Dict[str, Any]):
+        self.file_doc = file_doc
+        self.file_id: str = file_doc["_id"]
+        self._path: Optional[str] = None
+        self._spooled_path: Optional[str] = None
+
+    async def path(self) -> str:
+        if self._path is None:
+            backend = get_storage_backend(self.file_doc["storage_type"])
+            ref = storage_ref(self.file_doc)
+            if not ref or await backend.stat(ref) is None:
+                raise FileNotFoundError(f"Stored content for {self.file_id} is missing")
+            if isinstance(backend, LocalStorageBackend):
+                self._path = ref
+            else:
+                self._path = await self._spool(backend.open_stream(ref))
+        return self._path
+
+    async def _spool(self, stream: Any) -> str:
+        fd, path = tempfile.mkstemp(prefix=f"{self.file_id}.", suffix=".pdf", dir=PROCESSING_SPOOL_DIR)
+        os.close(fd)
+        self._spooled_path = path
+        async with aiofiles.open(path, "wb") as spool:
+            async for chunk in stream:
+                await spool.write(chunk)
+        return path
+
+    def close(self) -> None:
+        """Remove the spooled copy, if one was made"""
+        if self._spooled_path is not None:
+            try:
+                os.remove(self._spooled_path)
+            except FileNotFoundError:
+                pass
+            self._spooled_path = None
+        self._path = None
+
+
+Processor = Callable[[ProcessingContext], Awaitable[Optional[Dict[str, Any]]]]
+Cleanup = Callable[[str], Awaitable[None]]
+
+
+class StageTimer:
+    """Run count, failures and latency of one processing stage"""
+
+    def __init__(self):
+        self.runs = 0
+        self.failures = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_ms: Optional[float] = None
+
+    def record(self, elapsed_ms: float, ok: bool) -> None:
+        self.runs += 1
+        if not ok:
+            self.failures += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.last_ms = elapsed_ms
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "runs": self.runs,
+            "failures": self.failures,
+            "avg_ms": round(self.total_ms / self.runs, 2) if self.runs else None,
+            "max_ms": round(self.max_ms, 2),
+            "last_ms": round(self.last_ms, 2) if self.last_ms is not None else None
+        }
+
+
+class ProcessingPipeline:
+    """
+    Post-upload processing on a bounded pool of background workers.
+
+    Uploads return as soon as the file is stored with status "uploaded"
+    and call ``enqueue()``. A worker claims an "uploaded" record by moving
+    it to "processing", runs every registered processor in order and finally
+    sets "processed" together with the fields the processors returned. If a
+    processor raises, the record goes back to "uploaded" with the error and
+    is retried after a backoff, up to ``PROCESSING_MAX_ATTEMPTS`` runs; then,
+    or at once if validation quarantined the file, it is "failed". Blocking
+    work inside processors goes through ``run_blocking`` so it shares one
+    bounded thread pool; CPU-heavy parsing goes through ``run_in_process``.
+
+    The queue only holds file ids; the status field is the durable record,
+    so ``rescan()`` at startup and whenever the MongoDB circuit closes again
+    re-queues anything a restart or an outage interrupted.
+    """
+
+    def __init__(self, workers: int, processes: int):
+        self.workers = max(1, workers)
+        self.processes = max(1, processes)
+        self._processors: List[Dict[str, Any]] = []
+        self._queue: "asyncio.Queue[str]" = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._process_executor: Optional[ProcessPoolExecutor] = None
+        self.in_flight = 0
+        self.processed = 0
+        self.failed = 0
+        self.retried = 0
+        self._retries: Dict[str, asyncio.TimerHandle] = {}
+        self.stages: Dict[str, StageTimer] = {"total": StageTimer()}
+
+    def register(self, name: str, processor: Processor, cleanup: Optional[Cleanup] = None) -> None:
+        """
+        Add a processor; they run in registration order. ``cleanup(file_id)``
+        undoes its side effects if the file is deleted while being processed.
+        """
+        self._processors.append({"name": name, "processor": processor, "cleanup": cleanup})
+        self.stages[name] = StageTimer()
+
+    async def run_blocking(self, function: Callable, *args: Any) -> Any:
+        """Run a blocking or CPU-bound call on the pipeline's thread pool"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="processing")
+        return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+
+    async def run_in_process(self, function: Callable, *args: Any) -> Any:
+        """
+        Run a CPU-bound call in a worker process. ``function`` and its
+        arguments must be picklable; pass file paths rather than large
+        byte strings where possible.
+        """
+        if self._process_executor is None:
+            # Spawn rather than fork: the server process has Motor and executor threads running
+            self._process_executor = ProcessPoolExecutor(
+                max_workers=self.processes,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return await asyncio.get_running_loop().run_in_executor(self._process_executor, function, *args)
+
+    def enqueue(self, file_id: str) -> None:
+        """Schedule a stored file for processing; never blocks the caller"""
+        self._queue.put_nowait(file_id)
+
+    async def rescan(self, db: AsyncIOMotorDatabase, backfill: bool = PROCESSING_BACKFILL) -> int:
+        """
+        Queue every file still waiting for processing; returns how many were found.
+
+        A "processing" claim older than ``PROCESSING_STALE_SECONDS`` belongs
+        to a worker that died, so it goes back to "uploaded" first; younger
+        claims may still be running on another instance and are left alone.
+        Files stored before the pipeline existed have no ``processed_at``
+        field and are only queued with ``backfill`` (``PROCESSING_BACKFILL=true``).
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=PROCESSING_STALE_SECONDS)
+        recovered = await db.files.update_many(
+            {
+                "status": STATUS_PROCESSING,
+                "$or": [{"processing_started_at": {"$lt": cutoff}}, {"processing_started_at": None}]
+            },
+            {"$set": {"status": STATUS_UPLOADED}}
+        )
+        if recovered.modified_count:
+            print(f"🔁 Recovered {recovered.modified_count} files stuck in processing")
+
+        query: Dict[str, Any] = {"status": STATUS_UPLOADED}
+        if not backfill:
+            query["processed_at"] = {"$exists": True}
+        count = 0
+        async for file_doc in db.files.find(query, {"_id": 1}).sort("uploaded_at", 1):
+            self.enqueue(file_doc["_id"])
+            count += 1
+        if count:
+            print(f"🔁 Re-queued {count} unprocessed files")
+        return count
+
+    async def _worker(self) -> None:
+        while True:
+            file_id = await self._queue.get()
+            self.in_flight += 1
+            try:
+                await self.process(file_id)
+            except Exception as e:
+                print(f"⚠️  Processing {file_id} failed unexpectedly: {e}")
+            finally:
+                self.in_flight -= 1
+                self._queue.task_done()
+
+    def _retry(self, file_id: str) -> None:
+        self._retries.pop(file_id, None)
+        self.enqueue(file_id)
+
+    def start(self) -> None:
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for handle in self._retries.values():
+            handle.cancel()
+        self._retries = {}
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        if self._process_executor is not None:
+            self._process_executor.shutdown(wait=False, cancel_futures=True)
+            self._process_executor = None
+
+    async def process(self, file_id: str) -> Optional[str]:
+        """Run the processors for one file; returns the final status, or None if there was nothing to do"""
+        db = get_mongo_db()
+        file_doc = await db.files.find_one_and_update(
+            {"_id": file_id, "status": STATUS_UPLOADED},
+            {
+                "$set": {"status": STATUS_PROCESSING, "processing_started_at": datetime.utcnow()},
+                "$inc": {"processing_attempts": 1}
+            },
+            return_document=ReturnDocument.AFTER
+        )
+        if file_doc is None:
+            # Already processed, deleted, or claimed by another worker
+            return None
+
+        context = ProcessingContext(file_doc)
+        fields: Dict[str, Any] = {}
+        error: Optional[str] = None
+        started = time.monotonic()
+        try:
+            for entry in self._processors:
+                stage_started = time.monotonic()
+                try:
+                    fields.update(await entry["processor"](context) or {})
+                except Exception as e:
+                    self.stages[entry["name"]].record((time.monotonic() - stage_started) * 1000, ok=False)
+                    error = f"{entry['name']}: {type(e).__name__}: {e}"
+                    break
+                self.stages[entry["name"]].record((time.monotonic() - stage_started) * 1000, ok=True)
+        finally:
+            context.close()
+        self.stages["total"].record((time.monotonic() - started) * 1000, ok=error is None)
+
+        attempts = file_doc.get("processing_attempts", 1)
+        retry = error is not None and not context.file_doc.get("quarantined") and attempts < PROCESSING_MAX_ATTEMPTS
+        if retry:
+            status = STATUS_UPLOADED
+            fields.update({"status": status, "processing_error": error})
+        else:
+            status = STATUS_FAILED if error else STATUS_PROCESSED
+            fields.update({"status": status, "processing_error": error, "processed_at": datetime.utcnow()})
+        result = await db.files.update_one({"_id": file_id}, {"$set": fields})
+        metadata_cache.invalidate(file_id)
+        if not result.matched_count:
+            # Deleted while we were working; undo whatever the processors stored
+            for entry in self._processors:
+                if entry["cleanup"] is not None:
+                    await entry["cleanup"](file_id)
+            return None
+
+        if retry:
+            self.retried += 1
+            delay = PROCESSING_RETRY_DELAY_SECONDS * 2 ** (attempts - 1)
+            self._retries[file_id] = asyncio.get_running_loop().call_later(delay, self._retry, file_id)
+            print(f"⚠️  Processing failed for {file_id} (attempt {attempts}), retrying in {delay:.0f}s: {error}")
+        elif error:
+            self.failed += 1
+            print(f"⚠️  Processing failed for {file_id}: {error}")
+        else:
+            self.processed += 1
+        return status
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "processes": self.processes,
+            "running": bool(self._tasks),
+            "queue_depth": self._queue.qsize(),
+            "in_flight": self.in_flight,
+            "processed": self.processed,
+            "failed": self.failed,
+            "retried": self.retried,
+            "retries_scheduled": len(self._retries),
+            "processors": [entry["name"] for entry in self._processors],
+            "stages": {name: timer.stats() for name, timer in self.stages.items()}
+        }
+
+
+processing_pipeline = ProcessingPipeline(PROCESSING_WORKERS, PROCESSING_PROCESSES)
+
+
+async def validate_pdf(context: ProcessingContext) -> Dict[str, Any]:
+    """
+    First stage: full structural check of the stored PDF.
+
+    The header and trailer were already checked while the upload streamed
+    in; this parses the xref table and page tree in a worker process and
+    rejects encrypted or corrupt files before any later stage reads them.
+    The upload has already succeeded by then, so a rejected file is
+    quarantined instead of being refused, and is not retried.
+    """
+    try:
+        # The worker process reads the file itself; only the path is pickled
+        return await processing_pipeline.run_in_process(inspect_pdf, await context.path())
+    except InvalidPDFError as e:
+        await quarantine_file(context.file_doc, str(e))
+        raise
+
+
+processing_pipeline.register("validate", validate_pdf)
@@ -0,0 +1,216 @@
+import os
+import hashlib
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, AsyncIterator, Protocol
+import aiofiles
+import aiofiles.os
+from bson import ObjectId
+from bson.errors import InvalidId
+from gridfs.errors import NoFile
+from motor.motor_asyncio import AsyncIOMotorDatabase, AsyncIOMotorGridFSBucket
+
+# Size of the blocks pulled from the upload source during ingest.
+# Peak memory per upload is bounded by this value, not by the file size.
+UPLOAD_CHUNK_SIZE = int(os.environ.get("UPLOAD_CHUNK_SIZE", 1024 * 1024))
+
+# Size of the blocks yielded when streaming stored content back out
+DOWNLOAD_CHUNK_SIZE = int(os.environ.get("DOWNLOAD_CHUNK_SIZE", 256 * 1024))
+
+
+class AsyncReadable(Protocol):
+    """Anything with an UploadFile-style ``await read(size)``"""
+
+    async def read(self, size: int = -1) -> bytes:
+        ...
+
+
+def to_gridfs_id(gridfs_file_id: Any) -> Any:
+    """GridFS ids are stored as strings in the files collection; convert back to ObjectId"""
+    if isinstance(gridfs_file_id, str):
+        try:
+            return ObjectId(gridfs_file_id)
+        except InvalidId:
+            return gridfs_file_id
+    return gridfs_file_id
+
+
+async def commit_new_file(source_path: str, file_path: str) -> None:
+    """
+    Move ``source_path`` to ``file_path`` like a rename, but raise
+    FileExistsError instead of replacing a file already stored there.
+    """
+    await aiofiles.os.link(source_path, file_path)
+    await aiofiles.os.remove(source_path)
+
+
+class StorageBackend(ABC):
+    """
+    Where document bytes live.
+
+    Objects are addressed by an opaque ``ref`` string returned from ``put``
+    (a GridFS id or a file path). Every operation is non-blocking.
+    """
+
+    storage_type: str
+
+    @abstractmethod
+    async def put(self, name: str, source: AsyncReadable, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Store the source stream; returns ``ref``, ``file_size`` and ``sha256``"""
+
+    @abstractmethod
+    def open_stream(self, ref: str, start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+        """Yield the stored bytes between ``start`` and ``end`` (inclusive)"""
+
+    @abstractmethod
+    async def delete(self, ref: str) -> bool:
+        """Remove the object; returns False if it did not exist"""
+
+    @abstractmethod
+    async def stat(self, ref: str) -> Optional[Dict[str, Any]]:
+        """Return ``file_size`` and ``modified_at`` for the object, or None if missing"""
+
+
+class GridFSStorageBackend(StorageBackend):
+    """Stores documents in the default MongoDB GridFS bucket"""
+
+    storage_type = "gridfs"
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.db = db
+        self.fs = AsyncIOMotorGridFSBucket(db)
+
+    async def put(self, name: str, source: AsyncReadable, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        grid_in = self.fs.open_upload_stream(name, metadata=metadata)
+        sha256 = hashlib.sha256()
+        size = 0
+        try:
+            while True:
+                chunk = await source.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                sha256.update(chunk)
+                size += len(chunk)
+                await grid_in.write(chunk)
+            await grid_in.close()
+        except BaseException:
+            await grid_in.abort()
+            raise
+
+        return {
+            "ref": str(grid_in._id),
+            "file_size": size,
+            "sha256": sha256.hexdigest()
+        }
+
+    async def open_stream(self, ref: str, start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+        # Raises NoFile on the first iteration; callers that send headers first must stat() before
+        gridfs_out = await self.fs.open_download_stream(to_gridfs_id(ref))
+        if end is None:
+            end = gridfs_out.length - 1
+        remaining = end - start + 1
+        gridfs_out.seek(start)
+        while remaining > 0:
+            chunk = await gridfs_out.read(min(DOWNLOAD_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+    async def delete(self, ref: str) -> bool:
+        try:
+            await self.fs.delete(to_gridfs_id(ref))
+            return True
+        except NoFile:
+            return False
+
+    async def stat(self, ref: str) -> Optional[Dict[str, Any]]:
+        file_doc = await self.db.fs.files.find_one(
+            {"_id": to_gridfs_id(ref)},
+            {"length": 1, "uploadDate": 1}
+        )
+        if not file_doc:
+            return None
+        return {"file_size": file_doc["length"], "modified_at": file_doc["uploadDate"]}
+
+
+class LocalStorageBackend(StorageBackend):
+    """Stores documents as plain files under a local directory, using aiofiles for all I/O"""
+
+    storage_type = "filesystem"
+
+    def __init__(self, base_dir: str):
+        self.base_dir = base_dir
+
+    def path_for(self, name: str) -> str:
+        return os.path.join(self.base_dir, name)
+
+    async def put(self, name: str, source: AsyncReadable, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        await aiofiles.os.makedirs(self.base_dir, exist_ok=True)
+        file_path = self.path_for(name)
+        # Unique per write, so concurrent uploads to the same name never share a temp file
+        partial_path = f"{file_path}.{uuid.uuid4().hex}.part"
+        sha256 = hashlib.sha256()
+        size = 0
+        try:
+            async with aiofiles.open(partial_path, "wb") as buffer:
+                while True:
+                    chunk = await source.read(UPLOAD_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    sha256.update(chunk)
+                    size += len(chunk)
+                    await buffer.write(chunk)
+            # Only expose the file under its final name once it is complete
+            await commit_new_file(partial_path, file_path)
+        except BaseException:
+            if await aiofiles.os.path.exists(partial_path):
+                await aiofiles.os.remove(partial_path)
+            raise
+
+        return {
+            "ref": file_path,
+            "file_size": size,
+            "sha256": sha256.hexdigest()
+        }
+
+    async def adopt(self, name: str, source_path: str) -> str:
+        """
+        Move a fully written file on the same filesystem into the store.
+        No bytes are copied. Returns the new ``ref``.
+        """
+        await aiofiles.os.makedirs(self.base_dir, exist_ok=True)
+        file_path = self.path_for(name)
+        await commit_new_file(source_path, file_path)
+        return file_path
+
+    async def open_stream(self, ref: str, start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+        if end is None:
+            end = (await aiofiles.os.stat(ref)).st_size - 1
+        remaining = end - start + 1
+        async with aiofiles.open(ref, "rb") as f:
+            await f.seek(start)
+            while remaining > 0:
+                chunk = await f.read(min(DOWNLOAD_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    async def delete(self, ref: str) -> bool:
+        try:
+            await aiofiles.os.remove(ref)
+            return True
+        except FileNotFoundError:
+            return False
+
+    async def stat(self, ref: str) -> Optional[Dict[str, Any]]:
+        try:
+            stat_result = await aiofiles.os.stat(ref)
+        except FileNotFoundError:
+            return None
+        return {
+            "file_size": stat_result.st_size,
+            "modified_at": datetime.fromtimestamp(stat_result.st_mtime, tz=timezone.utc)
+        }
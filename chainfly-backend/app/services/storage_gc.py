@@ -0,0 +1,397 @@
+import os
+import time
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Any
+import aiofiles.os
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from app.services.file_service import (
+    UPLOAD_DIR, STORAGE_PROJECTION, local_storage, check_mongo_available,
+    delete_claimed_files, delete_gridfs_objects
+)
+from app.services.mongo_health import BackgroundProbe, mongo_health
+from app.services.storage import to_gridfs_id
+from app.services.document_index import document_indexer
+
+STORAGE_GC_INTERVAL_SECONDS = float(os.environ.get("STORAGE_GC_INTERVAL_SECONDS", 3600))
+
+# Objects younger than this are never reclaimed: an upload may still be
+# between writing its content and inserting the record that references it
+STORAGE_GC_GRACE_SECONDS = float(os.environ.get("STORAGE_GC_GRACE_SECONDS", 3600))
+
+# Records read per round trip while reconciling
+STORAGE_GC_PAGE_SIZE = int(os.environ.get("STORAGE_GC_PAGE_SIZE", 500))
+
+# Most orphaned objects reclaimed per second (0 = unlimited)
+STORAGE_GC_MAX_DELETES_PER_SECOND = float(os.environ.get("STORAGE_GC_MAX_DELETES_PER_SECOND", 20))
+
+# The scheduled run only reports orphans unless STORAGE_GC_DRY_RUN=false is set explicitly
+STORAGE_GC_DRY_RUN = os.environ.get("STORAGE_GC_DRY_RUN", "true").lower() != "false"
+
+# Files in uploads/ without a record are also written on purpose when MongoDB
+# is down (filesystem-only uploads), so deleting them is opt-in
+STORAGE_GC_RECLAIM_UPLOAD_DIR = os.environ.get("STORAGE_GC_RECLAIM_UPLOAD_DIR", "false").lower() == "true"
+
+# Orphan ids listed per category in a report
+MAX_REPORTED_ORPHANS = 20
+
+ORPHAN_CATEGORIES = ("interrupted_deletes", "blobs", "gridfs_files", "gridfs_chunks", "upload_dir")
+
+
+class RateLimiter:
+    """
+    Spaces out work so at most ``rate`` units run per second.
+
+    A request for several units waits until the last of them is due, so a
+    batch is never granted ahead of the rate it would have had item by item.
+    """
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self._next = time.monotonic()
+
+    async def acquire(self, units: int = 1) -> None:
+        if self.rate <= 0 or units <= 0:
+            return
+        now = time.monotonic()
+        ready_at = max(now, self._next) + (units - 1) / self.rate
+        self._next = ready_at + 1 / self.rate
+        if ready_at > now:
+            await asyncio.sleep(ready_at - now)
+
+
+class GCReport:
+    """What one collection run found and reclaimed"""
+
+    def __init__(self, dry_run: bool, grace_seconds: float):
+        self.dry_run = dry_run
+        self.grace_seconds = grace_seconds
+        self.started_at = datetime.utcnow()
+        self.finished_at: Optional[datetime] = None
+        self.scanned = {category: 0 for category in ORPHAN_CATEGORIES}
+        self.orphans = {category: 0 for category in ORPHAN_CATEGORIES}
+        self.reclaimed = {category: 0 for category in ORPHAN_CATEGORIES}
+        self.orphan_bytes = 0
+        self.samples: Dict[str, List[str]] = {category: [] for category in ORPHAN_CATEGORIES}
+        self.missing_content: List[str] = []
+        self.missing_content_count = 0
+        self.errors: List[str] = []
+
+    def found(self, category: str, orphan_id: Any, size: int = 0) -> None:
+        self.orphans[category] += 1
+        self.orphan_bytes += size or 0
+        if len(self.samples[category]) < MAX_REPORTED_ORPHANS:
+            self.samples[category].append(str(orphan_id))
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "dry_run": self.dry_run,
+            "grace_seconds": self.grace_seconds,
+            "started_at": self.started_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "scanned": self.scanned,
+            "orphans": self.orphans,
+            "reclaimed": self.reclaimed,
+            "orphan_bytes": self.orphan_bytes,
+            "samples": self.samples,
+            "missing_content": {"count": self.missing_content_count, "file_ids": self.missing_content},
+            "errors": self.errors
+        }
+
+
+class StorageGarbageCollector(BackgroundProbe):
+    """
+    Reconciles stored content against the ``files`` collection and reclaims orphans.
+
+    Each run pages through, in order:
+    - ``files`` records left claimed by an interrupted delete;
+    - ``blobs`` that no record references;
+    - ``fs.files`` objects that no record or blob references;
+    - ``fs.chunks`` whose ``fs.files`` document is gone;
+    - files under ``uploads/`` whose name no record stores.
+    Records whose content is missing are only reported, never deleted.
+
+    Nothing younger than ``grace_seconds`` is touched, and deletions are
+    spaced to ``max_deletes_per_second``. A dry run reports what would go;
+    the scheduled run is one unless ``STORAGE_GC_DRY_RUN=false``.
+    """
+
+    def __init__(
+        self,
+        interval_seconds: float,
+        grace_seconds: float,
+        page_size: int,
+        max_deletes_per_second: float,
+        dry_run: bool,
+        reclaim_upload_dir: bool
+    ):
+        self.interval_seconds = interval_seconds
+        self.grace_seconds = grace_seconds
+        self.page_size = max(1, page_size)
+        self.max_deletes_per_second = max_deletes_per_second
+        self.dry_run = dry_run
+        self.reclaim_upload_dir = reclaim_upload_dir
+        self._lock = asyncio.Lock()
+        self.runs = 0
+        self.last_report: Optional[Dict[str, Any]] = None
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    async def _run(self) -> None:
+        # Let startup finish before the first sweep
+        await asyncio.sleep(self.interval_seconds)
+        await super()._run()
+
+    async def probe(self) -> bool:
+        if not mongo_health.is_available() or self.running:
+            return False
+        try:
+            await self.collect(check_mongo_available(), self.dry_run)
+        except Exception as e:
+            print(f"⚠️  Storage GC failed: {e}")
+            return False
+        return True
+
+    async def collect(self, db: AsyncIOMotorDatabase, dry_run: bool) -> Dict[str, Any]:
+        async with self._lock:
+            report = GCReport(dry_run, self.grace_seconds)
+            limiter = RateLimiter(self.max_deletes_per_second)
+            cutoff = datetime.utcnow() - timedelta(seconds=self.grace_seconds)
+            for phase in (
+                self._interrupted_deletes,
+                self._blobs,
+                self._gridfs_files,
+                self._gridfs_chunks,
+                self._upload_dir,
+                self._missing_content
+            ):
+                try:
+                    await phase(db, report, limiter, cutoff)
+                except Exception as e:
+                    report.errors.append(f"{phase.__name__.lstrip('_')}: {type(e).__name__}: {e}")
+            report.finished_at = datetime.utcnow()
+            self.runs += 1
+            self.last_report = report.as_dict()
+            reclaimed = sum(report.reclaimed.values())
+            if reclaimed or any(report.orphans.values()):
+                print(
+                    f"🧹 Storage GC{' (dry run)' if dry_run else ''}: "
+                    f"{sum(report.orphans.values())} orphans found, {reclaimed} reclaimed"
+                )
+            return self.last_report
+
+    async def _interrupted_deletes(self, db, report: GCReport, limiter: RateLimiter, cutoff: datetime) -> None:
+        stale = {"deleting_at": {"$lt": cutoff}}
+        async for file_doc in db.files.find(stale, {"_id": 1}):
+            report.scanned["interrupted_deletes"] += 1
+            report.found("interrupted_deletes", file_doc["_id"])
+        if report.dry_run or not report.orphans["interrupted_deletes"]:
+            return
+        token = str(uuid.uuid4())
+        await db.files.update_many(stale, {"$set": {"deleting": token, "deleting_at": datetime.utcnow()}})
+        await limiter.acquire(report.orphans["interrupted_deletes"])
+        file_ids = await delete_claimed_files(db, token)
+        if file_ids:
+            await document_indexer.remove_many(file_ids)
+        report.reclaimed["interrupted_deletes"] += len(file_ids)
+
+    async def _blobs(self, db, report: GCReport, limiter: RateLimiter, cutoff: datetime) -> None:
+        last_id = None
+        while True:
+            query = {"created_at": {"$lt": cutoff}}
+            if last_id is not None:
+                query["_id"] = {"$gt": last_id}
+            page = [blob async for blob in db.blobs.find(query).sort("_id", 1).limit(self.page_size)]
+            if not page:
+                return
+            last_id = page[-1]["_id"]
+            report.scanned["blobs"] += len(page)
+            referenced = {
+                group["_id"] async for group in db.files.aggregate([
+                    {"$match": {"content_addressed": True, "sha256": {"$in": [blob["_id"] for blob in page]}}},
+                    {"$group": {"_id": "$sha256"}}
+                ])
+            }
+            for blob in page:
+                if blob["_id"] in referenced:
+                    continue
+                if blob.get("last_referenced_at") and blob["last_referenced_at"] >= cutoff:
+                    continue
+                report.found("blobs", blob["_id"], blob.get("file_size", 0))
+                if report.dry_run:
+                    continue
+                await limiter.acquire()
+                # Only if no upload took a reference since we read it
+                result = await db.blobs.delete_one({
+                    "_id": blob["_id"],
+                    "ref_count": blob["ref_count"],
+                    "last_referenced_at": blob.get("last_referenced_at")
+                })
+                if result.deleted_count:
+                    await delete_gridfs_objects(db, [blob["gridfs_file_id"]])
+                    report.reclaimed["blobs"] += 1
+
+    async def _gridfs_files(self, db, report: GCReport, limiter: RateLimiter, cutoff: datetime) -> None:
+        last_id = None
+        while True:
+            query = {"uploadDate": {"$lt": cutoff}}
+            if last_id is not None:
+                query["_id"] = {"$gt": last_id}
+            page = [
+                grid_file async for grid_file in
+                db.fs.files.find(query, {"length": 1}).sort("_id", 1).limit(self.page_size)
+            ]
+            if not page:
+                return
+            last_id = page[-1]["_id"]
+            report.scanned["gridfs_files"] += len(page)
+            # Records store GridFS ids as strings
+            refs = [str(grid_file["_id"]) for grid_file in page]
+            referenced = {
+                file_doc["gridfs_file_id"] async for file_doc in
+                db.files.find({"gridfs_file_id": {"$in": refs}}, {"gridfs_file_id": 1})
+            }
+            referenced.update([
+                blob["gridfs_file_id"] async for blob in
+                db.blobs.find({"gridfs_file_id": {"$in": refs}}, {"gridfs_file_id": 1})
+            ])
+            orphans = [grid_file for grid_file in page if str(grid_file["_id"]) not in referenced]
+            for grid_file in orphans:
+                report.found("gridfs_files", grid_file["_id"], grid_file.get("length", 0))
+            if orphans and not report.dry_run:
+                await limiter.acquire(len(orphans))
+                report.reclaimed["gridfs_files"] += await delete_gridfs_objects(
+                    db, [grid_file["_id"] for grid_file in orphans]
+                )
+
+    async def _gridfs_chunks(self, db, report: GCReport, limiter: RateLimiter, cutoff: datetime) -> None:
+        checked = set()
+        last_id = None
+        cutoff_id = ObjectId.from_datetime(cutoff)
+        while True:
+            query = {"_id": {"$lt": cutoff_id}}
+            if last_id is not None:
+                query["_id"]["$gt"] = last_id
+            page = [
+                chunk async for chunk in
+                db.fs.chunks.find(query, {"files_id": 1}).sort("_id", 1).limit(self.page_size)
+            ]
+            if not page:
+                return
+            last_id = page[-1]["_id"]
+            report.scanned["gridfs_chunks"] += len(page)
+            files_ids = list({chunk["files_id"] for chunk in page} - checked)
+            checked.update(files_ids)
+            existing = {
+                grid_file["_id"] async for grid_file in
+                db.fs.files.find({"_id": {"$in": files_ids}}, {"_id": 1})
+            }
+            for files_id in files_ids:
+                if files_id in existing:
+                    continue
+                # A GridFS upload writes fs.files last; its newest chunk shows whether it is still going
+                newest = await db.fs.chunks.find_one({"files_id": files_id}, {"_id": 1}, sort=[("_id", -1)])
+                if newest is None or newest["_id"] >= cutoff_id:
+                    continue
+                report.found("gridfs_chunks", files_id)
+                if report.dry_run:
+                    continue
+                await limiter.acquire()
+                await db.fs.chunks.delete_many({"files_id": files_id})
+                report.reclaimed["gridfs_chunks"] += 1
+
+    async def _upload_dir(self, db, report: GCReport, limiter: RateLimiter, cutoff: datetime) -> None:
+        if not await aiofiles.os.path.isdir(UPLOAD_DIR):
+            return
+        cutoff_timestamp = time.time() - self.grace_seconds
+        names = sorted(
+            name for name in await aiofiles.os.listdir(UPLOAD_DIR)
+            if not name.startswith(".")
+        )
+        for start in range(0, len(names), self.page_size):
+            candidates = {}
+            for name in names[start:start + self.page_size]:
+                path = local_storage.path_for(name)
+                try:
+                    stat_result = await aiofiles.os.stat(path)
+                except FileNotFoundError:
+                    continue
+                if not os.path.isfile(path):
+                    continue
+                report.scanned["upload_dir"] += 1
+                if stat_result.st_mtime < cutoff_timestamp:
+                    candidates[name] = stat_result.st_size
+            if not candidates:
+                continue
+            # Local files are written under their stored_filename. Matching on the
+            # name rather than the recorded absolute file_path keeps records written
+            # from another working directory or mount point referenced.
+            referenced = {
+                file_doc["stored_filename"] async for file_doc in
+                db.files.find({"stored_filename": {"$in": list(candidates)}}, {"stored_filename": 1})
+            }
+            for name, size in candidates.items():
+                if name in referenced:
+                    continue
+                report.found("upload_dir", name, size)
+                if report.dry_run or not self.reclaim_upload_dir:
+                    continue
+                await limiter.acquire()
+                if await local_storage.delete(local_storage.path_for(name)):
+                    report.reclaimed["upload_dir"] += 1
+
+    async def _missing_content(self, db, report: GCReport, limiter: RateLimiter, cutoff: datetime) -> None:
+        last_id = None
+        while True:
+            query = {"uploaded_at": {"$lt": cutoff}, "deleting": {"$exists": False}}
+            if last_id is not None:
+                query["_id"] = {"$gt": last_id}
+            page = [
+                file_doc async for file_doc in
+                db.files.find(query, STORAGE_PROJECTION).sort("_id", 1).limit(self.page_size)
+            ]
+            if not page:
+                return
+            last_id = page[-1]["_id"]
+            gridfs_refs = [file_doc["gridfs_file_id"] for file_doc in page if file_doc.get("gridfs_file_id")]
+            stored = {
+                str(grid_file["_id"]) async for grid_file in
+                db.fs.files.find({"_id": {"$in": [to_gridfs_id(ref) for ref in gridfs_refs]}}, {"_id": 1})
+            }
+            for file_doc in page:
+                if file_doc.get("gridfs_file_id"):
+                    present = file_doc["gridfs_file_id"] in stored
+                elif file_doc.get("file_path"):
+                    present = await aiofiles.os.path.exists(file_doc["file_path"])
+                else:
+                    present = False
+                if not present:
+                    report.missing_content_count += 1
+                    if len(report.missing_content) < MAX_REPORTED_ORPHANS:
+                        report.missing_content.append(file_doc["_id"])
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "runs": self.runs,
+            "dry_run": self.dry_run,
+            "reclaim_upload_dir": self.reclaim_upload_dir,
+            "interval_seconds": self.interval_seconds,
+            "grace_seconds": self.grace_seconds,
+            "max_deletes_per_second": self.max_deletes_per_second,
+            "last_report": self.last_report
+        }
+
+
+storage_gc = StorageGarbageCollector(
+    STORAGE_GC_INTERVAL_SECONDS,
+    STORAGE_GC_GRACE_SECONDS,
+    STORAGE_GC_PAGE_SIZE,
+    STORAGE_GC_MAX_DELETES_PER_SECOND,
+    STORAGE_GC_DRY_RUN,
+    STORAGE_GC_RECLAIM_UPLOAD_DIR
+)
@@ -0,0 +1,136 @@
+import os
+import hashlib
+from typing import Optional, List, Dict, Any, Set, Tuple
+from app.utils.text_utils import tokenize
+
+# 64 signature slots split into 16 bands of 4 rows: tenders above roughly 0.5
+# Jaccard similarity usually share a band, those above 0.8 almost always do
+MINHASH_PERMUTATIONS = 64
+LSH_BANDS = 16
+LSH_ROWS = MINHASH_PERMUTATIONS // LSH_BANDS
+
+# Estimated Jaccard similarity of shingle sets above which tenders are duplicates
+DEDUP_THRESHOLD = float(os.environ.get("DEDUP_THRESHOLD", 0.8))
+
+# Words per shingle
+SHINGLE_SIZE = 3
+
+# Shingles hash to 56 bits so signature values, offsets included, fit a BSON int64
+_HASH_BYTES = 7
+_SLOT_RANGE = (1 << (8 * _HASH_BYTES)) // MINHASH_PERMUTATIONS
+
+
+def _stable_hash(text: str) -> int:
+    # Signatures are stored with the tenders, so the hash must not change between processes
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=_HASH_BYTES).digest(), "big")
+
+
+def shingles(tender: Dict[str, Any]) -> Set[int]:
+    """Hashed word shingles of a tender's title and description"""
+    words = tokenize(f"{tender.get('title') or ''} {tender.get('description') or ''}")
+    if len(words) < SHINGLE_SIZE:
+        return {_stable_hash(word) for word in words}
+    return {
+        _stable_hash(" ".join(words[i:i + SHINGLE_SIZE]))
+        for i in range(len(words) - SHINGLE_SIZE + 1)
+    }
+
+
+def minhash_signature(tender: Dict[str, Any]) -> Optional[List[int]]:
+    """
+    One-permutation MinHash signature of a tender's text, or None if it has no text.
+
+    Each shingle hash is computed once; its low bits pick a signature slot
+    and the slot keeps the smallest remaining value. Empty slots borrow
+    from the next filled slot, offset by the distance, which keeps
+    signatures comparable while hashing each shingle only once instead
+    of once per slot.
+    """
+    hashed = shingles(tender)
+    if not hashed:
+        return None
+    slots: List[Optional[int]] = [None] * MINHASH_PERMUTATIONS
+    for value in hashed:
+        slot, rest = value % MINHASH_PERMUTATIONS, value // MINHASH_PERMUTATIONS
+        if slots[slot] is None or rest < slots[slot]:
+            slots[slot] = rest
+    signature = []
+    for slot in range(MINHASH_PERMUTATIONS):
+        distance = 0
+        while slots[(slot + distance) % MINHASH_PERMUTATIONS] is None:
+            distance += 1
+        signature.append(slots[(slot + distance) % MINHASH_PERMUTATIONS] + distance * _SLOT_RANGE)
+    return signature
+
+
+def estimated_similarity(first: List[int], second: List[int]) -> float:
+    """Fraction of agreeing signature positions, an estimate of Jaccard similarity"""
+    return sum(1 for x, y in zip(first, second) if x == y) / len(first)
+
+
+class TenderDedupIndex:
+    """
+    LSH band buckets over tender MinHash signatures.
+
+    Each signature is cut into ``LSH_BANDS`` bands, and tenders sharing any
+    band are candidate duplicates. Finding duplicates of a tender therefore
+    only looks at a handful of buckets, however many tenders are indexed.
+    Candidates are confirmed by comparing full signatures.
+    """
+
+    def __init__(self):
+        self._signatures: Dict[str, List[int]] = {}
+        self._canonical: Dict[str, str] = {}
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], Set[str]] = {}
+
+    @staticmethod
+    def _bands(signature: List[int]) -> List[Tuple[int, Tuple[int, ...]]]:
+        return [
+            (band, tuple(signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]))
+            for band in range(LSH_BANDS)
+        ]
+
+    def add(self, tender_id: str, signature: Optional[List[int]], canonical_id: Optional[str]) -> None:
+        self.remove(tender_id)
+        if not signature or len(signature) != MINHASH_PERMUTATIONS:
+            return
+        self._signatures[tender_id] = signature
+        if canonical_id:
+            self._canonical[tender_id] = canonical_id
+        for key in self._bands(signature):
+            self._buckets.setdefault(key, set()).add(tender_id)
+
+    def remove(self, tender_id: str) -> None:
+        signature = self._signatures.pop(tender_id, None)
+        self._canonical.pop(tender_id, None)
+        if signature is None:
+            return
+        for key in self._bands(signature):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(tender_id)
+                if not bucket:
+                    del self._buckets[key]
+
+    def find_canonical(self, signature: Optional[List[int]], exclude_id: Optional[str] = None) -> Optional[str]:
+        """
+        Canonical id of the most similar indexed tender above
+        ``DEDUP_THRESHOLD``, or None if the tender is not a duplicate.
+        """
+        if not signature:
+            return None
+        candidates: Set[str] = set()
+        for key in self._bands(signature):
+            candidates.update(self._buckets.get(key, ()))
+        candidates.discard(exclude_id)
+
+        best_id, best_similarity = None, DEDUP_THRESHOLD
+        for candidate in candidates:
+            similarity = estimated_similarity(signature, self._signatures[candidate])
+            if similarity > best_similarity or (similarity == best_similarity and best_id is None):
+                best_id, best_similarity = candidate, similarity
+        if best_id is None:
+            return None
+        canonical_id = self._canonical.get(best_id, best_id)
+        # Never link a tender to itself through a cluster it already heads
+        return None if canonical_id == exclude_id else canonical_id
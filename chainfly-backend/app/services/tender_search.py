@@ -0,0 +1,509 @@
+import os
+import math
+import asyncio
+from collections import Counter
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Callable, Set, Tuple
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from app.models.schemas import TenderSearchRequest
+from app.services.mongodb import get_mongo_db
+from app.services.mongo_health import mongo_health
+from app.services.cache import TTLCache
+from app.services.tender_suggest import TenderSuggestIndex
+from app.services.tender_dedup import TenderDedupIndex, minhash_signature
+from app.utils.text_utils import tokenize, normalize_value, trigrams, edit_distance
+from app.utils.range_utils import parse_capacity_mw, parse_capacity_range, parse_deadline_window, to_timestamp
+from app.utils.range_index import SortedRangeIndex
+from app.utils import bitset
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Title terms count this many times towards term frequency
+TITLE_WEIGHT = 2
+
+MAX_SEARCH_PAGE_SIZE = 100
+
+# Fuzzy matching: unknown query terms are always expanded to close vocabulary
+# terms; known terms too when the exact query finds fewer than this many tenders
+FUZZY_MIN_RESULTS = int(os.environ.get("FUZZY_MIN_RESULTS", 5))
+# Minimum Dice similarity of trigram sets for a term to be edit-distance checked
+FUZZY_MIN_SIMILARITY = float(os.environ.get("FUZZY_MIN_SIMILARITY", 0.3))
+# Close terms a query term may expand to
+FUZZY_MAX_EXPANSIONS = 3
+
+# Cached search responses. Keys include the index version, so any write makes
+# older entries unreachable; the TTL bounds how stale relative deadline
+# windows such as "14d" can get.
+search_cache = TTLCache(
+    max_size=int(os.environ.get("TENDER_SEARCH_CACHE_SIZE", 1024)),
+    ttl_seconds=float(os.environ.get("TENDER_SEARCH_CACHE_TTL_SECONDS", 60))
+)
+
+# Categorical fields with exact-match filters and facet counts
+FILTER_FIELDS = ("sector", "location", "status")
+
+# Numeric fields with range filters
+RANGE_FIELDS = ("capacity_mw", "deadline")
+
+
+# Stored with tenders for internal use only; never returned by the API
+INTERNAL_FIELDS = ("minhash",)
+
+
+def serialize_tender(tender: Dict[str, Any]) -> Dict[str, Any]:
+    """JSON-friendly copy of a tender document with a string ``id``"""
+    serialized = {}
+    for key, value in tender.items():
+        if key in INTERNAL_FIELDS:
+            continue
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        serialized[key] = value
+    serialized["_id"] = str(tender["_id"])
+    serialized["id"] = serialized["_id"]
+    return serialized
+
+
+def range_values(tender: Dict[str, Any]) -> Dict[str, float]:
+    """Capacity in MW and deadline timestamp of a tender, where they can be parsed"""
+    values = {}
+    capacity = tender.get("capacity_mw")
+    if capacity is None:
+        capacity = tender.get("capacity")
+    capacity = parse_capacity_mw(capacity)
+    if capacity is not None:
+        values["capacity_mw"] = capacity
+    deadline = to_timestamp(tender.get("deadline"))
+    if deadline is not None:
+        values["deadline"] = deadline
+    return values
+
+
+def max_edits(term: str) -> int:
+    """Typos tolerated in a query term; short terms get fewer"""
+    if len(term) < 3:
+        return 0
+    return 1 if len(term) <= 5 else 2
+
+
+class TenderSearchIndex:
+    """
+    In-process inverted index over tender titles and descriptions.
+
+    Tenders get a compact internal integer id so that filter postings can be
+    kept as bitsets. Keyword queries are ranked with BM25; structured
+    filters are intersected as bitsets before ranking. Capacity and deadline
+    are kept in sorted range indexes and answered by binary search.
+
+    Misspelled query terms fall back to vocabulary terms found through a
+    trigram index over the vocabulary (not the tenders) and confirmed by
+    edit distance; their matches score lower than exact ones.
+    """
+
+    def __init__(self):
+        self.loaded = False
+        # Bumped by every change to the indexed tenders
+        self.version = 0
+        self._load_lock = asyncio.Lock()
+        # Changes made while a load reads the collection, applied once it finishes
+        self._deferred: Optional[List[Tuple[Callable[[Any], Any], Any]]] = None
+        self._reset()
+
+    def _reset(self) -> None:
+        self.version += 1
+        self._ids: Dict[str, int] = {}
+        self._docs: List[Optional[Dict[str, Any]]] = []
+        self._free: List[int] = []
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._trigrams: Dict[str, Set[str]] = {}
+        self._doc_terms: Dict[int, Dict[str, int]] = {}
+        self._doc_lengths: Dict[int, int] = {}
+        self._total_length = 0
+        self._live = 0
+        self._values: Dict[str, Dict[str, int]] = {field: {} for field in FILTER_FIELDS}
+        # Display form of each normalized value, as first seen
+        self._labels: Dict[str, Dict[str, str]] = {field: {} for field in FILTER_FIELDS}
+        self._ranges: Dict[str, SortedRangeIndex] = {field: SortedRangeIndex() for field in RANGE_FIELDS}
+        # While bulk loading, bitset members are collected here and built once
+        self._pending: Optional[Dict[Any, List[int]]] = None
+        self.suggestions = TenderSuggestIndex()
+        self.duplicates = TenderDedupIndex()
+
+    def _add_member(self, key: Any, doc_id: int) -> None:
+        """Add doc_id to the bitset for ``key`` ("live" or a (field, value) pair)"""
+        if self._pending is not None:
+            self._pending.setdefault(key, []).append(doc_id)
+        elif key == "live":
+            self._live = bitset.add(self._live, doc_id)
+        else:
+            field, value = key
+            postings = self._values[field]
+            postings[value] = bitset.add(postings.get(value, 0), doc_id)
+
+    def _add_range_value(self, field: str, value: float, doc_id: int) -> None:
+        if self._pending is not None:
+            self._pending.setdefault(("range", field), []).append((value, doc_id))
+        else:
+            self._ranges[field].add(value, doc_id)
+
+    def _finish_bulk_load(self) -> None:
+        pending, self._pending = self._pending, None
+        self.suggestions.finish_bulk_load()
+        # Slots freed during the load are not reused until now, so a cleared slot marks a stale member
+        docs = self._docs
+        for key, doc_ids in pending.items():
+            if key == "live":
+                self._live = bitset.from_ids([doc_id for doc_id in doc_ids if docs[doc_id] is not None])
+            elif key[0] == "range":
+                self._ranges[key[1]].build([entry for entry in doc_ids if docs[entry[1]] is not None])
+            else:
+                field, value = key
+                bits = bitset.from_ids([doc_id for doc_id in doc_ids if docs[doc_id] is not None])
+                if bits:
+                    self._values[field][value] = bits
+        for field, labels in self._labels.items():
+            for value in [value for value in labels if value not in self._values[field]]:
+                del labels[value]
+
+    @property
+    def size(self) -> int:
+        return len(self._ids)
+
+    async def load(self, db: AsyncIOMotorDatabase) -> None:
+        """
+        Rebuild the index from the tenders collection.
+
+        ``upsert`` and ``remove`` calls made while the cursor is being read
+        are queued and replayed in order afterwards, so a tender changed or
+        deleted mid-load ends up in its latest state.
+        """
+        async with self._load_lock:
+            self._reset()
+            self._pending = {}
+            self._deferred = []
+            self.suggestions.begin_bulk_load()
+            try:
+                async for tender in db.tenders.find({}):
+                    self._upsert(tender)
+                self.loaded = True
+            finally:
+                self._finish_bulk_load()
+                deferred, self._deferred = self._deferred, None
+                for change, argument in deferred:
+                    change(argument)
+            print(f"✅ Tender search index loaded: {self.size} tenders")
+
+    def get(self, tender_id: str) -> Optional[Dict[str, Any]]:
+        doc_id = self._ids.get(tender_id)
+        return self._docs[doc_id] if doc_id is not None else None
+
+    def upsert(self, tender: Dict[str, Any]) -> None:
+        """Add a tender, replacing any previous version with the same id"""
+        if self._deferred is not None:
+            self._deferred.append((self._upsert, tender))
+            return
+        self._upsert(tender)
+
+    def _upsert(self, tender: Dict[str, Any]) -> None:
+        ranges = range_values(tender)
+        signature = tender.get("minhash") or minhash_signature(tender)
+        tender = serialize_tender(tender)
+        tender_id = tender["id"]
+        if tender_id in self._ids:
+            self._remove(tender_id)
+        self.version += 1
+
+        if self._free and self._pending is None:
+            doc_id = self._free.pop()
+        else:
+            doc_id = len(self._docs)
+            self._docs.append(None)
+        self._docs[doc_id] = tender
+        self._ids[tender_id] = doc_id
+        self._add_member("live", doc_id)
+
+        terms: Counter = Counter()
+        for term in tokenize(tender.get("title")):
+            terms[term] += TITLE_WEIGHT
+        for term in tokenize(tender.get("description")):
+            terms[term] += 1
+        self._doc_terms[doc_id] = dict(terms)
+        self._doc_lengths[doc_id] = sum(terms.values())
+        self._total_length += self._doc_lengths[doc_id]
+        for term, frequency in terms.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                for gram in trigrams(term):
+                    self._trigrams.setdefault(gram, set()).add(term)
+            postings[doc_id] = frequency
+
+        for field in FILTER_FIELDS:
+            value = normalize_value(tender.get(field))
+            if value:
+                self._add_member((field, value), doc_id)
+                self._labels[field].setdefault(value, " ".join(str(tender[field]).split()))
+
+        for field, value in ranges.items():
+            self._add_range_value(field, value, doc_id)
+
+        self.suggestions.add(tender)
+        self.duplicates.add(tender_id, signature, tender.get("canonical_id"))
+
+    def remove(self, tender_id: str) -> bool:
+        """Drop a tender from the index; returns False if it was not indexed"""
+        if self._deferred is not None:
+            self._deferred.append((self._remove, tender_id))
+            return True
+        return self._remove(tender_id)
+
+    def _remove(self, tender_id: str) -> bool:
+        doc_id = self._ids.pop(tender_id, None)
+        if doc_id is None:
+            return False
+        self.version += 1
+        tender = self._docs[doc_id]
+        self._docs[doc_id] = None
+        self._free.append(doc_id)
+        self._live = bitset.remove(self._live, doc_id)
+
+        terms = self._doc_terms.pop(doc_id, {})
+        self._total_length -= self._doc_lengths.pop(doc_id, 0)
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+                    for gram in trigrams(term):
+                        terms_with_gram = self._trigrams.get(gram)
+                        if terms_with_gram is not None:
+                            terms_with_gram.discard(term)
+                            if not terms_with_gram:
+                                del self._trigrams[gram]
+
+        for field in FILTER_FIELDS:
+            value = normalize_value(tender.get(field))
+            postings = self._values[field]
+            if value in postings:
+                postings[value] = bitset.remove(postings[value], doc_id)
+                if not postings[value]:
+                    del postings[value]
+                    self._labels[field].pop(value, None)
+
+        for range_index in self._ranges.values():
+            range_index.remove(doc_id)
+
+        self.suggestions.remove(tender)
+        self.duplicates.remove(tender_id)
+        return True
+
+    def _filter_bits(self, request: TenderSearchRequest) -> int:
+        """
+        Bitset of tenders matching every structured filter in the request.
+
+        Raises a 400 HTTPException for an unparseable capacity or deadline.
+        """
+        bits = self._live
+        for field in FILTER_FIELDS:
+            value = normalize_value(getattr(request, field, None))
+            if value:
+                bits &= self._values[field].get(value, 0)
+
+        capacity_bounds = parse_capacity_range(request.capacity_range)
+        if capacity_bounds is not None and bits:
+            bits &= self._ranges["capacity_mw"].query(*capacity_bounds)
+        deadline_bounds = parse_deadline_window(request.deadline)
+        if deadline_bounds is not None and bits:
+            bits &= self._ranges["deadline"].query(*deadline_bounds)
+        return bits
+
+    def fuzzy_terms(self, term: str) -> List[Tuple[str, float]]:
+        """
+        Vocabulary terms within a few edits of ``term``, with a weight that
+        shrinks with the distance.
+
+        Candidates come from the trigram postings of the term's own trigrams,
+        so the cost follows the vocabulary sharing those trigrams rather than
+        the number of tenders.
+        """
+        allowed_edits = max_edits(term)
+        if not allowed_edits:
+            return []
+        grams = trigrams(term)
+        shared: Dict[str, int] = {}
+        for gram in grams:
+            for candidate in self._trigrams.get(gram, ()):
+                shared[candidate] = shared.get(candidate, 0) + 1
+
+        matches = []
+        for candidate, common in shared.items():
+            if candidate == term or abs(len(candidate) - len(term)) > allowed_edits:
+                continue
+            # Padded trigram counts are length + 1, so this is the Dice coefficient
+            if 2 * common / (len(grams) + len(candidate) + 1) < FUZZY_MIN_SIMILARITY:
+                continue
+            distance = edit_distance(term, candidate, allowed_edits)
+            if distance <= allowed_edits:
+                matches.append((distance, -len(self._postings[candidate]), candidate))
+        matches.sort()
+        return [
+            (candidate, 1 - distance / max(len(term), len(candidate)))
+            for distance, _, candidate in matches[:FUZZY_MAX_EXPANSIONS]
+        ]
+
+    def _bm25_scores(self, terms: Dict[str, float], candidates: int) -> Dict[int, float]:
+        """BM25 score for every candidate containing at least one query term, scaled by term weight"""
+        scores: Dict[int, float] = {}
+        document_count = self.size
+        if not document_count:
+            return scores
+        average_length = self._total_length / document_count or 1.0
+        # Unfiltered queries skip the membership test entirely
+        allowed = None if candidates == self._live else set(bitset.to_ids(candidates))
+        for term, weight in terms.items():
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = weight * math.log(1 + (document_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, frequency in postings.items():
+                if allowed is not None and doc_id not in allowed:
+                    continue
+                length = self._doc_lengths[doc_id]
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+        return scores
+
+    def facets(self, bits: int) -> Dict[str, List[Dict[str, Any]]]:
+        """Per-value counts of sector, location and status within a result bitset"""
+        facets = {}
+        for field in FILTER_FIELDS:
+            counts = []
+            for value, postings in self._values[field].items():
+                matched = bitset.count(bits & postings)
+                if matched:
+                    counts.append({"value": self._labels[field].get(value, value), "count": matched})
+            counts.sort(key=lambda item: (-item["count"], item["value"]))
+            facets[field] = counts
+        return facets
+
+    def _collapse(self, ranked: List[Tuple[int, Optional[float]]]) -> Tuple[List[Tuple[int, Optional[float]]], Dict[int, int]]:
+        """Keep the best-ranked tender of each duplicate cluster and count the rest"""
+        representatives: Dict[str, int] = {}
+        duplicate_counts: Dict[int, int] = {}
+        collapsed = []
+        for doc_id, score in ranked:
+            tender = self._docs[doc_id]
+            cluster = tender.get("canonical_id") or tender["id"]
+            representative = representatives.get(cluster)
+            if representative is not None:
+                duplicate_counts[representative] = duplicate_counts.get(representative, 0) + 1
+                continue
+            representatives[cluster] = doc_id
+            collapsed.append((doc_id, score))
+        return collapsed, duplicate_counts
+
+    def _cache_key(self, request: TenderSearchRequest, page: int, page_size: int, collapse_duplicates: bool) -> tuple:
+        """Equivalent requests share a key: term order, case and spacing do not matter"""
+        return (
+            self.version,
+            tuple(sorted(set(tokenize(request.keyword)))),
+            tuple(normalize_value(getattr(request, field, None)) for field in FILTER_FIELDS),
+            parse_capacity_range(request.capacity_range),
+            normalize_value(request.deadline),
+            page,
+            page_size,
+            collapse_duplicates
+        )
+
+    def cached_search(
+        self,
+        request: TenderSearchRequest,
+        page: int = 1,
+        page_size: int = 20,
+        collapse_duplicates: bool = True
+    ) -> Dict[str, Any]:
+        """``search`` behind the shared result cache"""
+        page = max(page, 1)
+        page_size = max(1, min(page_size, MAX_SEARCH_PAGE_SIZE))
+        key = self._cache_key(request, page, page_size, collapse_duplicates)
+        response = search_cache.get(key)
+        if response is None:
+            response = self.search(request, page, page_size, collapse_duplicates)
+            search_cache.set(key, response)
+        return response
+
+    def search(
+        self,
+        request: TenderSearchRequest,
+        page: int = 1,
+        page_size: int = 20,
+        collapse_duplicates: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Rank and filter tenders; returns one page of results with scores and
+        facet counts. Duplicate clusters are collapsed to their best-ranked
+        tender unless ``collapse_duplicates`` is False.
+        """
+        page = max(page, 1)
+        page_size = max(1, min(page_size, MAX_SEARCH_PAGE_SIZE))
+        candidates = self._filter_bits(request)
+        terms = tokenize(request.keyword)
+
+        corrections: Dict[str, List[str]] = {}
+        if terms:
+            weighted_terms = {term: 1.0 for term in terms}
+            unknown = [term for term in weighted_terms if term not in self._postings]
+            scores = self._bm25_scores(weighted_terms, candidates) if len(unknown) < len(weighted_terms) else {}
+            # Fuzzy fallback: expand unknown terms, and known ones too if the exact query underperformed
+            expand = list(weighted_terms) if len(scores) < FUZZY_MIN_RESULTS else unknown
+            for term in expand:
+                for candidate, weight in self.fuzzy_terms(term):
+                    weighted_terms[candidate] = max(weighted_terms.get(candidate, 0.0), weight)
+                    corrections.setdefault(term, []).append(candidate)
+            if corrections:
+                scores = self._bm25_scores(weighted_terms, candidates)
+            ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+            matched = bitset.from_ids(scores)
+        else:
+            # No keyword: newest tenders first
+            ranked = [(doc_id, None) for doc_id in bitset.to_ids(candidates)]
+            ranked.sort(key=lambda item: self._docs[item[0]].get("created_at") or "", reverse=True)
+            matched = candidates
+
+        duplicate_counts: Dict[int, int] = {}
+        if collapse_duplicates:
+            ranked, duplicate_counts = self._collapse(ranked)
+            if duplicate_counts:
+                matched = bitset.from_ids(doc_id for doc_id, _ in ranked)
+
+        start = (page - 1) * page_size
+        results = []
+        for doc_id, score in ranked[start:start + page_size]:
+            result = dict(self._docs[doc_id])
+            result["score"] = round(score, 4) if score is not None else None
+            if collapse_duplicates:
+                result["duplicate_count"] = duplicate_counts.get(doc_id, 0)
+            results.append(result)
+
+        return {
+            "results": results,
+            "total": len(ranked),
+            "page": page,
+            "page_size": page_size,
+            "facets": self.facets(matched),
+            "corrections": corrections
+        }
+
+
+tender_index = TenderSearchIndex()
+
+
+async def ensure_tender_index_loaded() -> None:
+    """Load the index on first use if MongoDB was not available at startup"""
+    if tender_index.loaded:
+        return
+    if mongo_health.is_available():
+        await tender_index.load(get_mongo_db())
@@ -0,0 +1,378 @@
+import os
+import csv
+import json
+import uuid
+import base64
+import codecs
+from collections import deque
+from datetime import datetime
+from typing import Optional, List, Dict, Any, AsyncIterator, Deque, Tuple
+from bson import ObjectId
+from fastapi import HTTPException
+from pydantic import ValidationError
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from app.models.schemas import TenderCreate, TenderUpdate
+from app.services.mongodb import get_mongo_db
+from app.services.storage import AsyncReadable, UPLOAD_CHUNK_SIZE
+from app.services.tender_search import tender_index, serialize_tender, ensure_tender_index_loaded
+from app.services.tender_dedup import minhash_signature
+from app.utils.range_utils import parse_capacity_mw
+
+# Rows per bulk_write during imports; one round trip per batch, not per row
+TENDER_IMPORT_BATCH_SIZE = int(os.environ.get("TENDER_IMPORT_BATCH_SIZE", 500))
+
+# Row errors listed in an import report; the failed count is always exact
+MAX_REPORTED_IMPORT_ERRORS = 100
+
+MAX_TENDER_PAGE_SIZE = 500
+
+IMPORT_FORMATS = ("ndjson", "csv")
+
+
+def tender_id_query(tender_id: str) -> Dict[str, Any]:
+    """Match a tender by its string id, or by ObjectId for tenders created outside the API"""
+    if ObjectId.is_valid(tender_id):
+        return {"_id": {"$in": [tender_id, ObjectId(tender_id)]}}
+    return {"_id": tender_id}
+
+
+def tender_fields(tender: TenderCreate | TenderUpdate, exclude_unset: bool = False) -> Dict[str, Any]:
+    """Mongo fields for a validated tender, deriving capacity_mw from the capacity text"""
+    fields = tender.model_dump(exclude_unset=exclude_unset)
+    if fields.get("capacity_mw") is None and fields.get("capacity"):
+        capacity_mw = parse_capacity_mw(fields["capacity"])
+        if capacity_mw is not None:
+            fields["capacity_mw"] = capacity_mw
+    return fields
+
+
+def dedup_fields(tender_doc: Dict[str, Any], tender_id: Optional[str]) -> Dict[str, Any]:
+    """MinHash signature of a tender and the canonical tender it duplicates, if any"""
+    signature = minhash_signature(tender_doc)
+    return {
+        "minhash": signature,
+        "canonical_id": tender_index.duplicates.find_canonical(signature, tender_id)
+    }
+
+
+async def create_tender(tender: TenderCreate) -> Dict[str, Any]:
+    db = get_mongo_db()
+    await ensure_tender_index_loaded()
+    now = datetime.utcnow()
+    tender_doc = {"_id": str(uuid.uuid4()), **tender_fields(tender), "created_at": now, "updated_at": now}
+    tender_doc.update(dedup_fields(tender_doc, tender_doc["_id"]))
+    try:
+        await db.tenders.insert_one(tender_doc)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=409, detail=f"Tender {tender.tender_number} already exists")
+    tender_index.upsert(tender_doc)
+    return serialize_tender(tender_doc)
+
+
+async def get_tender(tender_id: str) -> Optional[Dict[str, Any]]:
+    """Serve from the search index when it is loaded, otherwise from MongoDB"""
+    indexed = tender_index.get(tender_id)
+    if indexed is not None:
+        return dict(indexed)
+    tender_doc = await get_mongo_db().tenders.find_one(tender_id_query(tender_id))
+    return serialize_tender(tender_doc) if tender_doc else None
+
+
+async def update_tender(tender_id: str, tender: TenderUpdate) -> Optional[Dict[str, Any]]:
+    db = get_mongo_db()
+    fields = tender_fields(tender, exclude_unset=True)
+    fields["updated_at"] = datetime.utcnow()
+    query = tender_id_query(tender_id)
+    if "title" in fields or "description" in fields:
+        # The text changed, so the tender may now belong to a different duplicate cluster
+        await ensure_tender_index_loaded()
+        existing = await db.tenders.find_one(query)
+        if existing is None:
+            return None
+        query = {"_id": existing["_id"]}
+        fields.update(dedup_fields({**existing, **fields}, str(existing["_id"])))
+    try:
+        tender_doc = await db.tenders.find_one_and_update(
+            query,
+            {"$set": fields},
+            return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        raise HTTPException(status_code=409, detail=f"Tender {tender.tender_number} already exists")
+    if tender_doc is None:
+        return None
+    tender_index.upsert(tender_doc)
+    return serialize_tender(tender_doc)
+
+
+async def delete_tender(tender_id: str) -> bool:
+    tender_doc = await get_mongo_db().tenders.find_one_and_delete(tender_id_query(tender_id), {"_id": 1})
+    if tender_doc is None:
+        return False
+    tender_index.remove(str(tender_doc["_id"]))
+    return True
+
+
+def encode_tender_cursor(tender_doc: Dict[str, Any]) -> str:
+    """Opaque cursor pointing just after ``tender_doc`` in (created_at, _id) order"""
+    position = [tender_doc["created_at"].isoformat(), str(tender_doc["_id"])]
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+
+def decode_tender_cursor(cursor: str) -> Dict[str, Any]:
+    """Turn a cursor back into a keyset filter; raises 400 if it is malformed"""
+    try:
+        created_at, tender_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        created_at = datetime.fromisoformat(created_at)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {
+        "$or": [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "_id": {"$lt": tender_id}}
+        ]
+    }
+
+
+async def list_tenders_page(limit: int = 100, cursor: Optional[str] = None) -> Dict[str, Any]:
+    """List tenders newest first using keyset pagination on (created_at, _id)"""
+    limit = max(1, min(limit, MAX_TENDER_PAGE_SIZE))
+    query = decode_tender_cursor(cursor) if cursor else {}
+    results = get_mongo_db().tenders.find(query).sort([("created_at", -1), ("_id", -1)]).limit(limit + 1)
+    tenders = [tender_doc async for tender_doc in results]
+    next_cursor = encode_tender_cursor(tenders[limit - 1]) if len(tenders) > limit else None
+    return {"tenders": [serialize_tender(tender_doc) for tender_doc in tenders[:limit]], "next_cursor": next_cursor}
+
+
+def detect_import_format(filename: Optional[str], content_type: Optional[str], requested: Optional[str]) -> str:
+    """Pick ndjson or csv from the explicit format, the file extension or the content type"""
+    if requested:
+        requested = requested.lower()
+        if requested not in IMPORT_FORMATS:
+            raise HTTPException(status_code=400, detail=f"Unsupported import format '{requested}'. Use ndjson or csv")
+        return requested
+    extension = os.path.splitext((filename or "").lower())[1]
+    if extension == ".csv" or (content_type or "").startswith("text/csv"):
+        return "csv"
+    if extension in (".ndjson", ".jsonl") or "ndjson" in (content_type or ""):
+        return "ndjson"
+    raise HTTPException(status_code=400, detail="Could not detect import format; pass format=ndjson or format=csv")
+
+
+async def iter_lines(source: AsyncReadable) -> AsyncIterator[Tuple[int, str]]:
+    """Decode a UTF-8 stream chunk by chunk and yield ``(line_number, line)`` pairs"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    pending = ""
+    line_number = 0
+    while True:
+        chunk = await source.read(UPLOAD_CHUNK_SIZE)
+        text = decoder.decode(chunk, final=not chunk)
+        if text:
+            lines = (pending + text).split("\n")
+            pending = lines.pop()
+            for line in lines:
+                line_number += 1
+                yield line_number, line.rstrip("\r")
+        if not chunk:
+            break
+    if pending:
+        yield line_number + 1, pending.rstrip("\r")
+
+
+async def iter_ndjson_rows(source: AsyncReadable) -> AsyncIterator[Tuple[int, Any]]:
+    """Yield ``(line_number, row)``; a row is a dict or the exception that made it unparseable"""
+    async for line_number, line in iter_lines(source):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+            if not isinstance(row, dict):
+                raise ValueError("each line must be a JSON object")
+        except ValueError as e:
+            row = e
+        yield line_number, row
+
+
+class CsvLineFeed:
+    """Line iterator for ``csv.reader`` that hands out the lines received so far and notes when it runs dry"""
+
+    def __init__(self):
+        self.lines: Deque[str] = deque()
+        self.starved = False
+
+    def __iter__(self) -> "CsvLineFeed":
+        return self
+
+    def __next__(self) -> str:
+        if not self.lines:
+            self.starved = True
+            raise StopIteration
+        return self.lines.popleft()
+
+
+async def iter_csv_rows(source: AsyncReadable) -> AsyncIterator[Tuple[int, Any]]:
+    """
+    Yield ``(line_number, row)`` for a CSV with a header line.
+
+    Decoded lines are fed to a single ``csv.reader`` as they arrive, so
+    quoting follows the csv module. When the reader runs out of lines
+    inside a quoted field, the lines of that record are fed again once the
+    next line has arrived.
+    """
+    feed = CsvLineFeed()
+    reader = csv.reader(feed)
+    header: Optional[List[str]] = None
+    record: List[str] = []
+    record_line = 0
+    async for line_number, line in iter_lines(source):
+        if not record:
+            record_line = line_number
+        record.append(line + "\n")
+        feed.lines.extend(record)
+        feed.starved = False
+        try:
+            values = next(reader)
+        except csv.Error as e:
+            feed.lines.clear()
+            record = []
+            yield record_line, ValueError(str(e))
+            continue
+        if feed.starved:
+            continue
+        record = []
+        if len(values) <= 1 and not "".join(values).strip():
+            continue
+        if header is None:
+            header = [name.strip().lower().replace(" ", "_") for name in values]
+            continue
+        if len(values) != len(header):
+            yield record_line, ValueError(f"expected {len(header)} columns, got {len(values)}")
+            continue
+        yield record_line, {name: value for name, value in zip(header, values) if value.strip()}
+    if record:
+        yield record_line, ValueError("unterminated quoted field")
+
+
+class TenderImport:
+    """Accumulates validated rows and flushes them as unordered bulk upserts keyed on tender_number"""
+
+    def __init__(self, batch_size: int = TENDER_IMPORT_BATCH_SIZE):
+        self.db = get_mongo_db()
+        self.batch_size = max(1, batch_size)
+        self.batch: Dict[str, Tuple[int, Dict[str, Any], Dict[str, Any]]] = {}
+        self.inserted = 0
+        self.updated = 0
+        self.failed = 0
+        self.duplicates = 0
+        self.errors: List[Dict[str, Any]] = []
+
+    def fail(self, line_number: int, error: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_IMPORT_ERRORS:
+            self.errors.append({"line": line_number, "error": error})
+
+    async def add(self, line_number: int, row: Any) -> None:
+        if isinstance(row, Exception):
+            self.fail(line_number, str(row))
+            return
+        try:
+            tender = TenderCreate(**row)
+        except ValidationError as e:
+            self.fail(line_number, "; ".join(
+                f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()
+            ))
+            return
+        # A repeated tender number must land after the earlier row, so flush first
+        if tender.tender_number in self.batch:
+            await self.flush()
+        # Columns missing from the row keep their stored value; defaults only fill in new tenders
+        fields = tender_fields(tender, exclude_unset=True)
+        defaults = {key: value for key, value in tender_fields(tender).items() if key not in fields}
+        self.batch[tender.tender_number] = (line_number, fields, defaults)
+        if len(self.batch) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self) -> None:
+        if not self.batch:
+            return
+        batch, self.batch = list(self.batch.items()), {}
+        now = datetime.utcnow()
+        operations = [
+            UpdateOne(
+                {"tender_number": tender_number},
+                {
+                    "$set": {**fields, "updated_at": now},
+                    "$setOnInsert": {**defaults, "_id": str(uuid.uuid4()), "created_at": now}
+                },
+                upsert=True
+            )
+            for tender_number, (_, fields, defaults) in batch
+        ]
+        try:
+            result = await self.db.tenders.bulk_write(operations, ordered=False)
+            self.inserted += result.upserted_count
+            self.updated += result.matched_count
+        except BulkWriteError as e:
+            self.inserted += e.details.get("nUpserted", 0)
+            self.updated += e.details.get("nMatched", 0)
+            for write_error in e.details.get("writeErrors", []):
+                line_number = batch[write_error["index"]][1][0]
+                self.fail(line_number, write_error.get("errmsg", "write failed"))
+
+        await self.link_duplicates([tender_number for tender_number, *_ in batch])
+
+    async def link_duplicates(self, tender_numbers: List[str]) -> None:
+        """
+        Re-sign the written tenders from their stored text, which a row with
+        missing columns only partly replaced. If the search index is loaded,
+        also index them and point each one at the canonical tender it
+        duplicates. Earlier tenders of the same batch count, because each
+        one is indexed before the next is checked.
+        """
+        links = []
+        async for tender_doc in self.db.tenders.find({"tender_number": {"$in": tender_numbers}}):
+            fields = {}
+            signature = minhash_signature(tender_doc)
+            if signature != tender_doc.get("minhash"):
+                tender_doc["minhash"] = fields["minhash"] = signature
+            if tender_index.loaded:
+                canonical_id = tender_index.duplicates.find_canonical(signature, str(tender_doc["_id"]))
+                if canonical_id:
+                    self.duplicates += 1
+                if canonical_id != tender_doc.get("canonical_id"):
+                    tender_doc["canonical_id"] = fields["canonical_id"] = canonical_id
+                tender_index.upsert(tender_doc)
+            if fields:
+                links.append(UpdateOne({"_id": tender_doc["_id"]}, {"$set": fields}))
+        if links:
+            await self.db.tenders.bulk_write(links, ordered=False)
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "failed": self.failed,
+            "duplicates": self.duplicates,
+            "processed": self.inserted + self.updated + self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors)
+        }
+
+
+async def import_tenders(source: AsyncReadable, import_format: str, batch_size: int = TENDER_IMPORT_BATCH_SIZE) -> Dict[str, Any]:
+    """
+    Stream-parse an NDJSON or CSV tender feed and upsert it in batches.
+
+    Rows are validated as they are read; invalid rows are counted and
+    reported with their line number without stopping the import. Only one
+    batch of rows is held in memory at a time. Written tenders are linked
+    to the canonical tender they near-duplicate, if any.
+    """
+    await ensure_tender_index_loaded()
+    rows = iter_csv_rows(source) if import_format == "csv" else iter_ndjson_rows(source)
+    tender_import = TenderImport(batch_size)
+    async for line_number, row in rows:
+        await tender_import.add(line_number, row)
+    await tender_import.flush()
+    return tender_import.report()
@@ -0,0 +1,195 @@
+import os
+import heapq
+from typing import Optional, List, Dict, Any, Set, Tuple
+from app.utils.text_utils import TOKEN_PATTERN, normalize_value
+from app.utils.range_utils import to_timestamp
+
+# Suggestions kept at every trie node; also the most a lookup can return
+SUGGEST_TOP_K = int(os.environ.get("SUGGEST_TOP_K", 10))
+
+# Tender fields offered as suggestions, in the order they are reported
+SUGGEST_FIELDS = ("title", "issuing_authority", "location")
+
+PhraseKey = Tuple[str, str]
+
+
+def suggest_words(text: Optional[str]) -> List[str]:
+    """Lowercase alphanumeric words, stopwords included so prefixes like "of" still match"""
+    return TOKEN_PATTERN.findall(text.lower()) if text else []
+
+
+class _TrieNode:
+    __slots__ = ("children", "top")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.top: List[PhraseKey] = []
+
+
+class TenderSuggestIndex:
+    """
+    Prefix autocomplete over tender titles, issuing authorities and locations.
+
+    Every distinct phrase is counted across tenders and remembers the newest
+    tender it appeared in. A character trie is built over the words of the
+    phrases, and each node keeps the top ``SUGGEST_TOP_K`` phrases with a
+    word starting with that prefix, ranked by count then recency. A
+    single-word lookup is a walk down the trie plus a slice.
+
+    Raising a phrase's rank only offers it to the nodes on its words' paths.
+    Lowering it recomputes just the nodes whose top list contained it.
+    """
+
+    def __init__(self, top_k: int = SUGGEST_TOP_K):
+        self.top_k = top_k
+        self._root = _TrieNode()
+        # (field, normalized phrase) -> [display text, tender count, newest timestamp, words]
+        self._phrases: Dict[PhraseKey, list] = {}
+        self._word_phrases: Dict[str, Set[PhraseKey]] = {}
+        self._bulk = False
+
+    @property
+    def size(self) -> int:
+        return len(self._phrases)
+
+    def _rank(self, key: PhraseKey) -> Tuple[int, float]:
+        entry = self._phrases[key]
+        return entry[1], entry[2]
+
+    def _path(self, word: str, create: bool) -> List[Tuple[str, _TrieNode]]:
+        """Nodes from the root down to ``word``, each with the character that leads to it"""
+        node = self._root
+        path = [("", node)]
+        for char in word:
+            child = node.children.get(char)
+            if child is None:
+                if not create:
+                    return []
+                child = node.children[char] = _TrieNode()
+            node = child
+            path.append((char, node))
+        return path
+
+    def _recompute(self, node: _TrieNode, word: str) -> None:
+        candidates = set(self._word_phrases.get(word, ()))
+        for child in node.children.values():
+            candidates.update(child.top)
+        node.top = heapq.nlargest(self.top_k, candidates, key=self._rank)
+
+    def _offer(self, node: _TrieNode, key: PhraseKey) -> None:
+        """Place a phrase whose rank went up into a node's top list if it now belongs there"""
+        if key not in node.top:
+            if len(node.top) >= self.top_k:
+                if self._rank(key) <= self._rank(node.top[-1]):
+                    return
+                node.top.pop()
+            node.top.append(key)
+        node.top.sort(key=self._rank, reverse=True)
+
+    def _phrase_keys(self, tender: Dict[str, Any]) -> List[Tuple[PhraseKey, str]]:
+        keys = []
+        for field in SUGGEST_FIELDS:
+            normalized = normalize_value(tender.get(field))
+            if normalized:
+                keys.append(((field, normalized), " ".join(str(tender[field]).split())))
+        return keys
+
+    def add(self, tender: Dict[str, Any]) -> None:
+        """Count the phrases of a tender"""
+        timestamp = to_timestamp(tender.get("created_at")) or 0.0
+        for key, text in self._phrase_keys(tender):
+            entry = self._phrases.get(key)
+            if entry is None:
+                words = set(suggest_words(key[1]))
+                entry = self._phrases[key] = [text, 0, timestamp, words]
+                for word in words:
+                    self._word_phrases.setdefault(word, set()).add(key)
+            entry[1] += 1
+            entry[2] = max(entry[2], timestamp)
+            if not self._bulk:
+                for word in entry[3]:
+                    for _, node in self._path(word, create=True):
+                        self._offer(node, key)
+
+    def remove(self, tender: Dict[str, Any]) -> None:
+        """Uncount the phrases of a tender, dropping phrases no tender uses any more"""
+        for key, _ in self._phrase_keys(tender):
+            entry = self._phrases.get(key)
+            if entry is None:
+                continue
+            entry[1] -= 1
+            if entry[1] <= 0:
+                for word in entry[3]:
+                    phrases = self._word_phrases.get(word)
+                    if phrases is not None:
+                        phrases.discard(key)
+                        if not phrases:
+                            del self._word_phrases[word]
+            for word in entry[3]:
+                path = self._path(word, create=False)
+                # Bottom-up, so every child's top list is final before its parent reads it
+                for depth in range(len(path) - 1, -1, -1):
+                    char, node = path[depth]
+                    if key in node.top:
+                        if entry[1] <= 0 or len(node.top) >= self.top_k:
+                            # Something outside the list may now outrank it
+                            self._recompute(node, word[:depth])
+                        else:
+                            node.top.sort(key=self._rank, reverse=True)
+                    if depth and not node.top and not node.children:
+                        del path[depth - 1][1].children[char]
+            if entry[1] <= 0:
+                del self._phrases[key]
+
+    def begin_bulk_load(self) -> None:
+        self._root = _TrieNode()
+        self._phrases = {}
+        self._word_phrases = {}
+        self._bulk = True
+
+    def finish_bulk_load(self) -> None:
+        """Build the trie and every node's top list in one post-order pass"""
+        self._bulk = False
+        for word in self._word_phrases:
+            self._path(word, create=True)
+        stack = [(self._root, "", False)]
+        while stack:
+            node, prefix, expanded = stack.pop()
+            if expanded:
+                self._recompute(node, prefix)
+                continue
+            stack.append((node, prefix, True))
+            for char, child in node.children.items():
+                stack.append((child, prefix + char, False))
+
+    def suggest(self, query: str, limit: int = SUGGEST_TOP_K) -> List[Dict[str, Any]]:
+        """
+        Phrases with a word starting with the last word of ``query`` that
+        also contain every earlier word, best first.
+        """
+        words = suggest_words(query)
+        if not words:
+            return []
+        limit = max(1, min(limit, self.top_k))
+        prefix, required = words[-1], set(words[:-1])
+        path = self._path(prefix, create=False)
+        if not path:
+            return []
+        node = path[-1][1]
+
+        keys = [key for key in node.top if required <= self._phrases[key][3]]
+        if required and len(keys) < limit:
+            # The node's top list was too narrow; intersect the earlier words' phrases instead
+            candidate_sets = sorted((self._word_phrases.get(word, set()) for word in required), key=len)
+            candidates = set.intersection(*candidate_sets) if candidate_sets[0] else set()
+            keys = heapq.nlargest(
+                limit,
+                (key for key in candidates if any(word.startswith(prefix) for word in self._phrases[key][3])),
+                key=self._rank
+            )
+
+        suggestions = []
+        for key in keys[:limit]:
+            text, count, _, _ = self._phrases[key]
+            suggestions.append({"text": text, "field": key[0], "count": count})
+        return suggestions
@@ -0,0 +1,386 @@
+import os
+import time
+import asyncio
+import hashlib
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, AsyncIterator
+import aiofiles
+import aiofiles.os
+from fastapi import HTTPException
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+from app.services.file_service import (
+    UPLOAD_DIR, local_storage, metadata_cache, validate_file_type, check_mongo_available,
+    build_file_metadata, upload_result
+)
+from app.services.mongo_health import BackgroundProbe, mongo_health
+from app.services.storage import UPLOAD_CHUNK_SIZE
+from app.utils.pdf_utils import PdfStreamValidator, InvalidPDFError, check_pdf_header, PDF_HEADER_WINDOW
+
+# Partial uploads are unvalidated, so they live outside every served directory
+# (uploads/ is mounted as static files), next to it on the same filesystem so
+# finalizing is a rename, not a copy
+UPLOAD_SESSION_DIR = os.environ.get("UPLOAD_SESSION_DIR", os.path.join(os.path.dirname(UPLOAD_DIR), "upload_sessions"))
+
+# How long one chunk PUT may hold a session before another PUT or finalize may take over
+UPLOAD_CHUNK_LEASE_SECONDS = float(os.environ.get("UPLOAD_CHUNK_LEASE_SECONDS", 600))
+
+# A session with no chunk for this long is abandoned and garbage-collected
+UPLOAD_SESSION_TTL_SECONDS = float(os.environ.get("UPLOAD_SESSION_TTL_SECONDS", 24 * 3600))
+UPLOAD_SESSION_GC_INTERVAL_SECONDS = float(os.environ.get("UPLOAD_SESSION_GC_INTERVAL_SECONDS", 600))
+
+# Largest single PUT, and largest file accepted through a session
+MAX_UPLOAD_CHUNK_SIZE = int(os.environ.get("MAX_UPLOAD_CHUNK_SIZE", 64 * 1024 * 1024))
+MAX_RESUMABLE_UPLOAD_SIZE = int(os.environ.get("MAX_RESUMABLE_UPLOAD_SIZE", 2 * 1024 * 1024 * 1024))
+
+SESSION_OPEN = "open"
+SESSION_FINALIZING = "finalizing"
+
+
+def session_path(session_id: str) -> str:
+    return os.path.join(UPLOAD_SESSION_DIR, f"{session_id}.part")
+
+
+def session_view(session: Dict[str, Any]) -> Dict[str, Any]:
+    """Shape a session document for the API; ``received`` is where the next chunk starts"""
+    return {
+        "session_id": session["_id"],
+        "tender_id": session["tender_id"],
+        "document_type": session["document_type"],
+        "filename": session["filename"],
+        "file_size": session["file_size"],
+        "received": session["received"],
+        "status": session["status"],
+        "expires_at": session["expires_at"].isoformat()
+    }
+
+
+def require_mongo() -> AsyncIOMotorDatabase:
+    db = check_mongo_available()
+    if db is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Resumable uploads need MongoDB; use /documents/upload instead"
+        )
+    return db
+
+
+async def _remove_part_file(session_id: str) -> None:
+    try:
+        await aiofiles.os.remove(session_path(session_id))
+    except FileNotFoundError:
+        pass
+
+
+async def _discard_session(db: AsyncIOMotorDatabase, session_id: str) -> None:
+    await _remove_part_file(session_id)
+    await db.upload_sessions.delete_one({"_id": session_id})
+
+
+async def create_upload_session(
+    tender_id: str,
+    document_type: str,
+    filename: str,
+    file_size: int,
+    content_type: Optional[str] = None
+) -> Dict[str, Any]:
+    """Start a resumable upload of ``file_size`` bytes"""
+    if not validate_file_type(filename):
+        raise HTTPException(status_code=400, detail=f"Only PDF files are allowed. Received: {filename}")
+    if file_size <= 0:
+        raise HTTPException(status_code=400, detail="file_size must be positive")
+    if file_size > MAX_RESUMABLE_UPLOAD_SIZE:
+        raise HTTPException(status_code=413, detail=f"Files larger than {MAX_RESUMABLE_UPLOAD_SIZE} bytes are not accepted")
+    db = require_mongo()
+
+    session_id = str(uuid.uuid4())
+    await aiofiles.os.makedirs(UPLOAD_SESSION_DIR, exist_ok=True)
+    # Created up front so every chunk is a positioned write into an existing file
+    async with aiofiles.open(session_path(session_id), "wb"):
+        pass
+    now = datetime.utcnow()
+    session = {
+        "_id": session_id,
+        "tender_id": tender_id,
+        "document_type": document_type,
+        "filename": filename,
+        "content_type": content_type or "application/pdf",
+        "file_size": file_size,
+        "received": 0,
+        "status": SESSION_OPEN,
+        "writer": None,
+        "created_at": now,
+        "expires_at": now + timedelta(seconds=UPLOAD_SESSION_TTL_SECONDS)
+    }
+    await db.upload_sessions.insert_one(session)
+    return session_view(session)
+
+
+async def get_upload_session(session_id: str) -> Dict[str, Any]:
+    session = await require_mongo().upload_sessions.find_one({"_id": session_id})
+    if not session:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    return session_view(session)
+
+
+async def write_upload_chunk(session_id: str, offset: int, chunks: AsyncIterator[bytes]) -> Dict[str, Any]:
+    """
+    Write one chunk of a session at ``offset`` and record it once it is on disk.
+
+    ``offset`` may repeat bytes already received (a retry after a lost
+    response) but must not leave a gap. A chunk only counts once it has
+    been fsynced, so a crash or dropped connection loses at most the chunk
+    in flight; the client resumes from the returned ``received``.
+
+    The PUT holds the session's writer lease while it writes, so chunks of
+    one session never interleave and finalize cannot start underneath it.
+    """
+    db = require_mongo()
+    token = str(uuid.uuid4())
+    session = await _acquire_writer(db, session_id, token)
+    try:
+        return await _write_chunk(db, session, token, offset, chunks)
+    finally:
+        # No-op once the final update has released the lease or the session is gone
+        await db.upload_sessions.update_one({"_id": session_id, "writer": token}, {"$set": {"writer": None}})
+
+
+async def _acquire_writer(db: AsyncIOMotorDatabase, session_id: str, token: str) -> Dict[str, Any]:
+    now = datetime.utcnow()
+    session = await db.upload_sessions.find_one_and_update(
+        {
+            "_id": session_id,
+            "status": SESSION_OPEN,
+            "$or": [{"writer": None}, {"writer_expires_at": {"$lt": now}}]
+        },
+        {"$set": {"writer": token, "writer_expires_at": now + timedelta(seconds=UPLOAD_CHUNK_LEASE_SECONDS)}},
+        return_document=ReturnDocument.AFTER
+    )
+    if session is not None:
+        return session
+    session = await db.upload_sessions.find_one({"_id": session_id}, {"status": 1})
+    if not session:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    if session["status"] != SESSION_OPEN:
+        raise HTTPException(status_code=409, detail=f"Upload session is {session['status']}")
+    raise HTTPException(status_code=409, detail="Another chunk is being written to this session; retry shortly")
+
+
+async def _write_chunk(
+    db: AsyncIOMotorDatabase,
+    session: Dict[str, Any],
+    token: str,
+    offset: int,
+    chunks: AsyncIterator[bytes]
+) -> Dict[str, Any]:
+    session_id = session["_id"]
+    if offset > session["received"]:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Chunk at offset {offset} would leave a gap; resume from offset {session['received']}"
+        )
+
+    # Stop writing before the lease runs out and finalize may take the session over
+    deadline = time.monotonic() + UPLOAD_CHUNK_LEASE_SECONDS
+    written = 0
+    head = b""
+    async with aiofiles.open(session_path(session_id), "r+b") as part_file:
+        await part_file.seek(offset)
+        async for chunk in chunks:
+            if not chunk:
+                continue
+            if time.monotonic() > deadline:
+                raise HTTPException(status_code=408, detail="Chunk took longer than its lease; resume from the session offset")
+            written += len(chunk)
+            if written > MAX_UPLOAD_CHUNK_SIZE:
+                raise HTTPException(status_code=413, detail=f"Chunks are limited to {MAX_UPLOAD_CHUNK_SIZE} bytes")
+            if offset + written > session["file_size"]:
+                raise HTTPException(status_code=400, detail="Chunk runs past the declared file_size")
+            if offset == 0 and len(head) < PDF_HEADER_WINDOW:
+                head += chunk[:PDF_HEADER_WINDOW - len(head)]
+                if len(head) == PDF_HEADER_WINDOW or len(head) == session["file_size"]:
+                    # Fail a renamed file on its first chunk rather than after the whole upload
+                    try:
+                        check_pdf_header(head)
+                    except InvalidPDFError as e:
+                        await _discard_session(db, session_id)
+                        raise HTTPException(status_code=400, detail=f"{session['filename']}: {e}")
+            await part_file.write(chunk)
+        await part_file.flush()
+        await asyncio.to_thread(os.fsync, part_file.fileno())
+
+    now = datetime.utcnow()
+    session = await db.upload_sessions.find_one_and_update(
+        {"_id": session_id, "status": SESSION_OPEN, "writer": token},
+        {"$set": {
+            "received": max(session["received"], offset + written),
+            "writer": None,
+            "updated_at": now,
+            "expires_at": now + timedelta(seconds=UPLOAD_SESSION_TTL_SECONDS)
+        }},
+        return_document=ReturnDocument.AFTER
+    )
+    if session is None:
+        raise HTTPException(status_code=409, detail="Upload session changed while the chunk was written; check its offset and retry")
+    return session_view(session)
+
+
+async def _check_and_hash(path: str) -> str:
+    """SHA-256 of the assembled file, reading it once through the streaming PDF checks"""
+    sha256 = hashlib.sha256()
+    async with aiofiles.open(path, "rb") as part_file:
+        source = PdfStreamValidator(part_file)
+        while True:
+            chunk = await source.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+async def finalize_upload_session(session_id: str) -> Dict[str, Any]:
+    """
+    Turn a complete session into a stored file.
+
+    The part file is renamed into the upload directory and registered
+    through the same files-collection document as a direct upload, so
+    listing, download and the processing pipeline treat it the same.
+    The session only moves to "finalizing" while no chunk PUT holds its
+    writer lease, and PUTs are refused from then on, so the bytes hashed
+    are the bytes adopted.
+    """
+    db = require_mongo()
+    session = await db.upload_sessions.find_one_and_update(
+        {
+            "_id": session_id,
+            "status": SESSION_OPEN,
+            "$or": [{"writer": None}, {"writer_expires_at": {"$lt": datetime.utcnow()}}]
+        },
+        {"$set": {"status": SESSION_FINALIZING, "writer": None}},
+        return_document=ReturnDocument.AFTER
+    )
+    if session is None:
+        session = await db.upload_sessions.find_one({"_id": session_id}, {"status": 1})
+        if not session:
+            raise HTTPException(status_code=404, detail="Upload session not found")
+        if session["status"] != SESSION_OPEN:
+            raise HTTPException(status_code=409, detail="Upload session is already being finalized")
+        raise HTTPException(status_code=409, detail="A chunk is still being written; finalize once it completes")
+
+    if session["received"] != session["file_size"]:
+        await db.upload_sessions.update_one({"_id": session_id}, {"$set": {"status": SESSION_OPEN}})
+        raise HTTPException(
+            status_code=409,
+            detail=f"Upload incomplete: received {session['received']} of {session['file_size']} bytes"
+        )
+
+    part_path = session_path(session_id)
+    try:
+        sha256 = await _check_and_hash(part_path)
+    except InvalidPDFError as e:
+        await _discard_session(db, session_id)
+        raise HTTPException(status_code=400, detail=f"{session['filename']}: {e}")
+
+    file_metadata = build_file_metadata(
+        session["tender_id"], session["document_type"], session["filename"], session["content_type"]
+    )
+    file_metadata["file_path"] = await local_storage.adopt(file_metadata["stored_filename"], part_path)
+    file_metadata["file_size"] = session["file_size"]
+    file_metadata["sha256"] = sha256
+    try:
+        await db.files.insert_one(file_metadata)
+    except Exception:
+        # Put the bytes back so the client can retry finalize
+        await aiofiles.os.replace(file_metadata["file_path"], part_path)
+        await db.upload_sessions.update_one({"_id": session_id}, {"$set": {"status": SESSION_OPEN}})
+        raise
+    metadata_cache.invalidate(file_metadata["_id"])
+    await db.upload_sessions.delete_one({"_id": session_id})
+    print(f"✅ Resumable upload {session_id} finalized as file {file_metadata['_id']}")
+    return upload_result({"file_metadata": file_metadata, "deduplicated": False}, mongo_available=True)
+
+
+async def abort_upload_session(session_id: str) -> bool:
+    db = require_mongo()
+    session = await db.upload_sessions.find_one({"_id": session_id}, {"status": 1})
+    if not session:
+        return False
+    if session["status"] != SESSION_OPEN:
+        raise HTTPException(status_code=409, detail=f"Upload session is {session['status']}")
+    await _discard_session(db, session_id)
+    return True
+
+
+class UploadSessionCollector(BackgroundProbe):
+    """
+    Periodically removes abandoned upload sessions.
+
+    Sessions past ``expires_at`` lose their part file and record. Part
+    files without any session record (a crash between creating the file
+    and inserting the session) are removed once they are older than the
+    session TTL.
+    """
+
+    def __init__(self, interval_seconds: float, ttl_seconds: float):
+        self.interval_seconds = interval_seconds
+        self.ttl_seconds = ttl_seconds
+        self.collected = 0
+        self.orphan_files_removed = 0
+        self.last_run_at: Optional[datetime] = None
+
+    async def probe(self) -> bool:
+        if not mongo_health.is_available():
+            return False
+        try:
+            await self.collect(check_mongo_available())
+        except Exception as e:
+            print(f"⚠️  Upload session cleanup failed: {e}")
+            return False
+        return True
+
+    async def collect(self, db: AsyncIOMotorDatabase) -> int:
+        now = datetime.utcnow()
+        expired = [
+            session["_id"]
+            async for session in db.upload_sessions.find({"expires_at": {"$lt": now}}, {"_id": 1})
+        ]
+        for session_id in expired:
+            await _remove_part_file(session_id)
+            await db.upload_sessions.delete_one({"_id": session_id, "expires_at": {"$lt": now}})
+
+        if await aiofiles.os.path.isdir(UPLOAD_SESSION_DIR):
+            cutoff = time.time() - self.ttl_seconds
+            for name in await aiofiles.os.listdir(UPLOAD_SESSION_DIR):
+                path = os.path.join(UPLOAD_SESSION_DIR, name)
+                session_id = name[:-len(".part")] if name.endswith(".part") else None
+                try:
+                    if (await aiofiles.os.stat(path)).st_mtime >= cutoff:
+                        continue
+                except FileNotFoundError:
+                    continue
+                if session_id and await db.upload_sessions.count_documents({"_id": session_id}, limit=1):
+                    continue
+                try:
+                    await aiofiles.os.remove(path)
+                    self.orphan_files_removed += 1
+                except FileNotFoundError:
+                    pass
+
+        self.collected += len(expired)
+        self.last_run_at = now
+        if expired:
+            print(f"🧹 Removed {len(expired)} abandoned upload sessions")
+        return len(expired)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "collected": self.collected,
+            "orphan_files_removed": self.orphan_files_removed,
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None,
+            "interval_seconds": self.interval_seconds,
+            "ttl_seconds": self.ttl_seconds
+        }
+
+
+upload_session_collector = UploadSessionCollector(UPLOAD_SESSION_GC_INTERVAL_SECONDS, UPLOAD_SESSION_TTL_SECONDS)
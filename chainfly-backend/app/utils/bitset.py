@@ -0,0 +1,40 @@
+from typing import Iterable, List
+
+# Document sets are Python ints used as bitsets: bit i is set when internal
+# document id i is a member. AND/OR/popcount run in C over the whole set.
+
+
+def from_ids(ids: Iterable[int]) -> int:
+    """Build a bitset from internal document ids"""
+    ids = list(ids)
+    if not ids:
+        return 0
+    buffer = bytearray((max(ids) >> 3) + 1)
+    for doc_id in ids:
+        buffer[doc_id >> 3] |= 1 << (doc_id & 7)
+    return int.from_bytes(buffer, "little")
+
+
+def to_ids(bits: int) -> List[int]:
+    """List the internal document ids in a bitset, ascending"""
+    ids = []
+    data = bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+    for byte_index, byte in enumerate(data):
+        if byte:
+            base = byte_index << 3
+            for bit in range(8):
+                if byte >> bit & 1:
+                    ids.append(base + bit)
+    return ids
+
+
+def count(bits: int) -> int:
+    return bits.bit_count()
+
+
+def add(bits: int, doc_id: int) -> int:
+    return bits | (1 << doc_id)
+
+
+def remove(bits: int, doc_id: int) -> int:
+    return bits & ~(1 << doc_id)
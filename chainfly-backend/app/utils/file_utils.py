@@ -1,6 +1,7 @@
 import os
 from fastapi import UploadFile, HTTPException
 import shutil
+from app.utils.pdf_utils import check_pdf_header, check_pdf_trailer, InvalidPDFError, PDF_HEADER_WINDOW, PDF_TRAILER_WINDOW
 
 # Set the base path to "uploads" folder inside your project directory
 UPLOAD_DIR = os.path.join(os.getcwd(), "uploads")  # will point to chainfly-backend\uploads
@@ -27,7 +28,17 @@ def save_uploaded_file(upload_file: UploadFile, tender_id: str, document_type: s
     filename = f"{tender_id}_{document_type}_{upload_file.filename}"
     file_path = os.path.join(UPLOAD_DIR, filename)
 
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(upload_file.file, buffer)
+    try:
+        check_pdf_header(upload_file.file.read(PDF_HEADER_WINDOW))
+        upload_file.file.seek(0)
+        with open(file_path, "wb") as buffer:
+            shutil.copyfileobj(upload_file.file, buffer)
+        with open(file_path, "rb") as written:
+            written.seek(max(os.path.getsize(file_path) - PDF_TRAILER_WINDOW, 0))
+            check_pdf_trailer(written.read())
+    except InvalidPDFError as e:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise HTTPException(status_code=400, detail=f"{upload_file.filename}: {e}")
 
     return file_path
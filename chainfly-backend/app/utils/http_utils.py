@@ -0,0 +1,106 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional, Tuple, Dict, Any, Mapping
+from urllib.parse import quote
+from fastapi import HTTPException
+
+
+def parse_range_header(range_header: Optional[str], file_size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range ``Range: bytes=...`` header.
+
+    Returns an inclusive ``(start, end)`` tuple, or None when the whole file
+    should be served (no header, a non-bytes unit, or a multi-range request).
+    Raises a 416 HTTPException when the range cannot be satisfied.
+    """
+    if not range_header:
+        return None
+
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or not spec or "," in spec:
+        return None
+
+    start_text, sep, end_text = spec.strip().partition("-")
+    if not sep:
+        return None
+
+    try:
+        if start_text == "":
+            # Suffix range: the last N bytes
+            suffix_length = int(end_text)
+            if suffix_length <= 0:
+                raise ValueError
+            start = max(file_size - suffix_length, 0)
+            end = file_size - 1
+        else:
+            start = int(start_text)
+            end = int(end_text) if end_text else file_size - 1
+            end = min(end, file_size - 1)
+    except ValueError:
+        return None
+
+    if start < 0 or start >= file_size or end < start:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{file_size}"}
+        )
+
+    return start, end
+
+
+def build_etag(file_doc: Dict[str, Any]) -> str:
+    """Build a strong ETag for a file document"""
+    if file_doc.get("sha256"):
+        return f'"{file_doc["sha256"]}"'
+    return f'"{file_doc["_id"]}-{file_doc.get("file_size", 0)}"'
+
+
+def to_utc_datetime(value: Any) -> Optional[datetime]:
+    """Normalize a datetime or ISO string (naive values are treated as UTC)"""
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def format_http_date(value: datetime) -> str:
+    """Format a datetime for Last-Modified style headers"""
+    return format_datetime(value.replace(microsecond=0), usegmt=True)
+
+
+def is_not_modified(
+    request_headers: Mapping[str, str],
+    etag: str,
+    last_modified: Optional[datetime]
+) -> bool:
+    """Evaluate If-None-Match / If-Modified-Since against the current validators"""
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        candidates = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return last_modified.replace(microsecond=0) <= since
+
+    return False
+
+
+def content_disposition(filename: str, inline: bool = False) -> str:
+    """Build a Content-Disposition header that survives non-ASCII filenames"""
+    disposition = "inline" if inline else "attachment"
+    fallback = filename.encode("ascii", "ignore").decode().replace('"', "")
+    return f"{disposition}; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename)}"
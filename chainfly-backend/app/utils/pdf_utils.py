@@ -0,0 +1,116 @@
+import io
+import re
+from typing import Any, BinaryIO, Dict
+from pypdf import PdfReader
+
+PDF_MAGIC = b"%PDF-"
+
+# Readers accept the header anywhere in the first KiB
+PDF_HEADER_WINDOW = 1024
+
+# startxref and %%EOF must sit at the very end; allow some trailing junk
+PDF_TRAILER_WINDOW = 2048
+
+STARTXREF_PATTERN = re.compile(rb"startxref\s+(\d+)")
+
+# What a startxref offset must point at: a classic xref table or an xref stream object
+XREF_SECTION_PATTERN = re.compile(rb"\s*(?:xref|\d+\s+\d+\s+obj)")
+
+
+class InvalidPDFError(ValueError):
+    """Uploaded content is not a usable PDF"""
+
+
+def check_pdf_header(head: bytes) -> None:
+    """Reject content that does not start like a PDF (renamed Word files, HTML error pages, ...)"""
+    if not head:
+        raise InvalidPDFError("File is empty")
+    if PDF_MAGIC not in head[:PDF_HEADER_WINDOW]:
+        raise InvalidPDFError("File content is not a PDF (missing %PDF- header)")
+
+
+def check_pdf_trailer(tail: bytes) -> None:
+    """Reject content whose end lacks the trailer every complete PDF has, typically a truncated upload"""
+    if b"%%EOF" not in tail or b"startxref" not in tail:
+        raise InvalidPDFError("PDF is truncated or corrupt (missing startxref/%%EOF trailer)")
+
+
+class PdfStreamValidator:
+    """
+    Wraps an upload source and checks the cheap PDF invariants while it is read.
+
+    The header is checked as soon as the first KiB has arrived, so a
+    renamed file fails before anything past its first chunk is stored.
+    The last ``PDF_TRAILER_WINDOW`` bytes are kept and checked for the
+    trailer when the source is exhausted. Either check raises
+    ``InvalidPDFError`` from ``read``, which aborts the storage write.
+    """
+
+    def __init__(self, source: Any):
+        self.source = source
+        self._head = b""
+        self._head_checked = False
+        self._tail = b""
+
+    async def read(self, size: int = -1) -> bytes:
+        chunk = await self.source.read(size)
+        if not self._head_checked:
+            self._head += chunk[:PDF_HEADER_WINDOW]
+            if not chunk or len(self._head) >= PDF_HEADER_WINDOW:
+                check_pdf_header(self._head)
+                self._head_checked = True
+        if chunk:
+            self._tail = (self._tail + chunk)[-PDF_TRAILER_WINDOW:]
+        else:
+            check_pdf_trailer(self._tail)
+        return chunk
+
+
+def check_xref_offset(stream: BinaryIO) -> None:
+    """
+    Follow the last ``startxref`` to its cross-reference section.
+
+    pypdf silently rebuilds a broken xref by scanning the whole file, so a
+    damaged file would otherwise pass as long as some objects survive.
+    """
+    stream.seek(0, io.SEEK_END)
+    size = stream.tell()
+    stream.seek(max(size - PDF_TRAILER_WINDOW, 0))
+    offsets = STARTXREF_PATTERN.findall(stream.read())
+    if not offsets:
+        raise InvalidPDFError("PDF is truncated or corrupt (missing startxref/%%EOF trailer)")
+    offset = int(offsets[-1])
+    if offset >= size:
+        raise InvalidPDFError("PDF is corrupt (startxref points past the end of the file)")
+    stream.seek(offset)
+    if not XREF_SECTION_PATTERN.match(stream.read(64)):
+        raise InvalidPDFError("PDF is corrupt (startxref does not point at a cross-reference section)")
+
+
+def inspect_pdf(path: str) -> Dict[str, Any]:
+    """
+    Check the cross-reference section and parse the page tree of a PDF file.
+
+    Rejects encrypted files and anything pypdf cannot open. CPU-bound and
+    potentially slow on large or malformed files, so run it in a worker
+    process rather than on the event loop.
+    """
+    stream = open(path, "rb")
+    try:
+        check_xref_offset(stream)
+        stream.seek(0)
+        reader = PdfReader(stream)
+        if reader.is_encrypted:
+            raise InvalidPDFError("Encrypted PDFs are not accepted")
+        page_count = len(reader.pages)
+        version = reader.pdf_header[len(PDF_MAGIC):] or None
+    except (InvalidPDFError, OSError):
+        raise
+    except Exception as e:
+        # pypdf surfaces damaged files through many exception types
+        raise InvalidPDFError(f"PDF structure is corrupt: {e}") from e
+    finally:
+        stream.close()
+    if not page_count:
+        raise InvalidPDFError("PDF has no pages")
+    return {"page_count": page_count, "pdf_version": version}
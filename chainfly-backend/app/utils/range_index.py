@@ -0,0 +1,59 @@
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Tuple
+from app.utils import bitset
+from app.utils.range_utils import Bound
+
+
+class SortedRangeIndex:
+    """
+    Numeric values of one field kept as parallel arrays sorted by value.
+
+    A range query is two binary searches plus a slice, so it costs
+    O(log n + matches) instead of a scan over every document. Matches come
+    back as a bitset so they can be intersected with the other filters.
+    """
+
+    def __init__(self):
+        self._keys: List[float] = []
+        self._doc_ids: List[int] = []
+        self._values: Dict[int, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def build(self, pairs: Iterable[Tuple[float, int]]) -> None:
+        """Replace the contents with ``(value, doc_id)`` pairs in one sort"""
+        entries = sorted(pairs)
+        self._keys = [value for value, _ in entries]
+        self._doc_ids = [doc_id for _, doc_id in entries]
+        self._values = {doc_id: value for value, doc_id in entries}
+
+    def add(self, value: float, doc_id: int) -> None:
+        self.remove(doc_id)
+        position = bisect_right(self._keys, value)
+        self._keys.insert(position, value)
+        self._doc_ids.insert(position, doc_id)
+        self._values[doc_id] = value
+
+    def remove(self, doc_id: int) -> None:
+        value = self._values.pop(doc_id, None)
+        if value is None:
+            return
+        start = bisect_left(self._keys, value)
+        end = bisect_right(self._keys, value)
+        position = start + self._doc_ids[start:end].index(doc_id)
+        del self._keys[position]
+        del self._doc_ids[position]
+
+    def query(self, low: Bound, high: Bound) -> int:
+        """Bitset of documents whose value lies between the bounds"""
+        start, end = 0, len(self._keys)
+        if low is not None:
+            value, inclusive = low
+            start = bisect_left(self._keys, value) if inclusive else bisect_right(self._keys, value)
+        if high is not None:
+            value, inclusive = high
+            end = bisect_right(self._keys, value) if inclusive else bisect_left(self._keys, value)
+        if start >= end:
+            return 0
+        return bitset.from_ids(self._doc_ids[start:end])
@@ -0,0 +1,128 @@
+import re
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Optional, Tuple
+from fastapi import HTTPException
+
+# Bounds are (value, inclusive); None means the side is open
+Bound = Optional[Tuple[float, bool]]
+
+CAPACITY_UNITS_MW = {"kw": 0.001, "mw": 1.0, "gw": 1000.0}
+
+# "50", "50MW", "1.5 GW", "500 kWp"
+CAPACITY_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*(kw|mw|gw)?", re.IGNORECASE)
+
+# "30d", "30 days", "next 30 days"
+DAYS_PATTERN = re.compile(r"^(?:next\s+)?(\d+)\s*(?:d|day|days)?$")
+
+
+def parse_capacity_mw(value: Any) -> Optional[float]:
+    """Capacity of a tender in MW from a number or a string such as "50 MW" or "1.5 GW" """
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = CAPACITY_PATTERN.search(str(value))
+    if not match:
+        return None
+    return float(match.group(1)) * CAPACITY_UNITS_MW[(match.group(2) or "mw").lower()]
+
+
+def _capacity_bound(text: str, unit: Optional[str] = None) -> float:
+    match = CAPACITY_PATTERN.fullmatch(text.strip())
+    if not match:
+        raise ValueError(text)
+    return float(match.group(1)) * CAPACITY_UNITS_MW[(match.group(2) or unit or "mw").lower()]
+
+
+def parse_capacity_range(capacity_range: Optional[str]) -> Optional[Tuple[Bound, Bound]]:
+    """
+    Parse a capacity filter into ``(low, high)`` bounds in MW.
+
+    Accepts "10-50", "10–50 MW", "10 to 50 MW", "1-2 GW", ">=10", "<50",
+    "10+" and a single value for an exact match. A unit on the upper bound
+    applies to a bare lower bound. Raises a 400 HTTPException otherwise.
+    """
+    if not capacity_range or not capacity_range.strip():
+        return None
+    text = capacity_range.strip().lower().replace("–", "-").replace("—", "-")
+    text = re.sub(r"\s+to\s+", "-", text)
+    try:
+        for operator in (">=", "<=", ">", "<"):
+            if text.startswith(operator):
+                bound = (_capacity_bound(text[len(operator):]), "=" in operator)
+                return (bound, None) if operator.startswith(">") else (None, bound)
+        if text.endswith("+"):
+            return (_capacity_bound(text[:-1]), True), None
+        low_text, sep, high_text = text.partition("-")
+        if sep:
+            high_match = CAPACITY_PATTERN.fullmatch(high_text.strip())
+            unit = high_match.group(2) if high_match else None
+            low, high = _capacity_bound(low_text, unit), _capacity_bound(high_text)
+            if low > high:
+                raise ValueError(text)
+            return (low, True), (high, True)
+        value = _capacity_bound(text)
+        return (value, True), (value, True)
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid capacity_range '{capacity_range}'. Use e.g. '10-50 MW', '>=5', '100+'"
+        )
+
+
+def to_timestamp(value: Any) -> Optional[float]:
+    """POSIX timestamp for a date, datetime or ISO string; naive values are taken as UTC"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.timestamp()
+    if isinstance(value, date):
+        return datetime.combine(value, time.min, tzinfo=timezone.utc).timestamp()
+    return None
+
+
+def _day_bounds(text: str) -> Tuple[float, float]:
+    """First and last instant of a calendar day given as YYYY-MM-DD"""
+    day = date.fromisoformat(text.strip())
+    start = datetime.combine(day, time.min, tzinfo=timezone.utc)
+    return start.timestamp(), (start + timedelta(days=1)).timestamp()
+
+
+def parse_deadline_window(deadline: Optional[str], now: Optional[datetime] = None) -> Optional[Tuple[Bound, Bound]]:
+    """
+    Parse a deadline filter into ``(low, high)`` timestamp bounds.
+
+    "14", "14d" or "next 14 days" mean closing between now and 14 days from
+    now. "2024-07-01..2024-07-31" (or "/" as the separator) is an inclusive
+    date window, with either side optional. A single date means closing on
+    or before that day. Raises a 400 HTTPException otherwise.
+    """
+    if not deadline or not deadline.strip():
+        return None
+    text = deadline.strip().lower()
+    now = now or datetime.now(timezone.utc)
+    try:
+        match = DAYS_PATTERN.match(text)
+        if match:
+            return (now.timestamp(), True), ((now + timedelta(days=int(match.group(1)))).timestamp(), True)
+        separator = ".." if ".." in text else "/" if "/" in text else None
+        if separator:
+            start_text, _, end_text = text.partition(separator)
+            low = (_day_bounds(start_text)[0], True) if start_text.strip() else None
+            high = (_day_bounds(end_text)[1], False) if end_text.strip() else None
+            if low is None and high is None:
+                raise ValueError(text)
+            return low, high
+        return None, (_day_bounds(text)[1], False)
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid deadline '{deadline}'. Use e.g. '14d', '2024-07-01..2024-07-31' or '2024-07-31'"
+        )
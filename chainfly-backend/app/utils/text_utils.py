@@ -0,0 +1,80 @@
+import re
+from typing import List, Optional, Set
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Words too common in tender notices to help ranking
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is",
+    "it", "of", "on", "or", "the", "to", "with", "tender", "tenders", "notice"
+}
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lowercase alphanumeric tokens with stopwords removed"""
+    if not text:
+        return []
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def normalize_value(value: Optional[str]) -> Optional[str]:
+    """Normalize a categorical value (sector, location, status) for exact matching"""
+    if value is None:
+        return None
+    value = " ".join(str(value).split()).lower()
+    return value or None
+
+
+def trigrams(term: str) -> Set[str]:
+    """Character trigrams of a term, padded so the start and end count as well"""
+    padded = f"$${term}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """
+    Levenshtein distance with adjacent transpositions, giving up early.
+
+    Returns ``max_distance + 1`` as soon as the distance is known to exceed
+    ``max_distance``, so rejecting a far-off candidate costs a few rows.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    before_previous: Optional[List[int]] = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        row_min = i
+        for j in range(1, len(b) + 1):
+            value = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (a[i - 1] != b[j - 1])
+            )
+            if before_previous is not None and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, before_previous[j - 2] + 1)
+            current[j] = value
+            row_min = min(row_min, value)
+        if row_min > max_distance:
+            return max_distance + 1
+        before_previous, previous = previous, current
+    return previous[-1]
+
+
+def build_snippet(text: str, terms: List[str], width: int = 160) -> str:
+    """A window of ``text`` around the first query term it contains, whitespace collapsed"""
+    lowered = text.lower()
+    positions = []
+    for term in terms:
+        match = re.search(rf"\b{re.escape(term)}", lowered)
+        if match:
+            positions.append(match.start())
+    center = min(positions) if positions else 0
+    start = max(0, center - width // 3)
+    end = min(len(text), start + width)
+    snippet = " ".join(text[start:end].split())
+    if start > 0:
+        snippet = f"…{snippet}"
+    if end < len(text):
+        snippet = f"{snippet}…"
+    return snippet
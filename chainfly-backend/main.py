@@ -1,7 +1,6 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
 import os
 
 # Import routes directly (since we're in the same directory)
@@ -51,13 +50,13 @@ app.include_router(reminders.router, prefix="/reminders", tags=["Reminders"])
 
 # File download endpoint
 @app.get("/files/{filename}")
-async def download_file(filename: str):
-    file_path = os.path.join(uploads_dir, filename)
-    if os.path.exists(file_path):
-        return FileResponse(file_path, filename=filename)
-    else:
-        from fastapi import HTTPException
+async def download_file(filename: str, request: Request):
+    from app.services.download_service import build_path_response
+    
+    if os.path.basename(filename) != filename:
         raise HTTPException(status_code=404, detail="File not found")
+    file_path = os.path.join(uploads_dir, filename)
+    return build_path_response(request, file_path, filename)
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Tender Search Index Test Script
+Check that tenders changed while the index is loading end up in their latest state
+"""
+
+import asyncio
+from app.models.schemas import TenderSearchRequest
+from app.services.tender_search import TenderSearchIndex
+
+
+class PausingCursor:
+    """Async cursor over in-memory tenders that stops after ``pause_after`` of them until released"""
+
+    def __init__(self, tenders, pause_after, paused, release):
+        self.tenders = list(tenders)
+        self.pause_after = pause_after
+        self.paused = paused
+        self.release = release
+
+    async def __aiter__(self):
+        for position, tender in enumerate(self.tenders):
+            if position == self.pause_after:
+                self.paused.set()
+                await self.release.wait()
+            yield tender
+
+
+class FakeCollection:
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    def find(self, query):
+        return self.cursor
+
+
+class FakeDB:
+    def __init__(self, cursor):
+        self.tenders = FakeCollection(cursor)
+
+
+def tender(tender_id, title, sector, location):
+    return {"_id": tender_id, "tender_number": tender_id, "title": title, "sector": sector, "location": location}
+
+
+async def check_load_interleaved_with_changes():
+    """Remove and update tenders while load() is waiting on its cursor"""
+    paused, release = asyncio.Event(), asyncio.Event()
+    tenders = [
+        tender("t1", "Solar park", "Solar", "Rajasthan"),
+        tender("t2", "Wind farm", "Wind", "Gujarat"),
+        tender("t3", "Rooftop solar", "Solar", "Delhi"),
+    ]
+    index = TenderSearchIndex()
+    load = asyncio.create_task(index.load(FakeDB(PausingCursor(tenders, 2, paused, release))))
+    await paused.wait()
+
+    # t1 and t2 are already read; t2 is deleted and t1 moves to another sector
+    index.remove("t2")
+    index.upsert(tender("t1", "Solar park", "Hydro", "Rajasthan"))
+    release.set()
+    await load
+
+    results = index.search(TenderSearchRequest(), page_size=10)
+    ids = sorted(result["id"] for result in results["results"])
+    assert ids == ["t1", "t3"], ids
+    assert index.get("t2") is None
+    sectors = {item["value"]: item["count"] for item in results["facets"]["sector"]}
+    assert sectors == {"Hydro": 1, "Solar": 1}, sectors
+    locations = {item["value"] for item in results["facets"]["location"]}
+    assert locations == {"Rajasthan", "Delhi"}, locations
+    assert index.search(TenderSearchRequest(sector="Wind"))["total"] == 0
+
+    # Changes after the load apply immediately again
+    assert index.remove("t3")
+    assert index.get("t3") is None
+    print("✅ Changes made during a load are applied after it")
+    return True
+
+
+def test_load_interleaved_with_remove():
+    assert asyncio.run(check_load_interleaved_with_changes())
+
+
+if __name__ == "__main__":
+    print("🚀 Tender Search Index Test")
+    print("=" * 50)
+    test_load_interleaved_with_remove()
+    print("\n🎉 All tests PASSED!")
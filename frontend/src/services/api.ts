@@ -46,35 +46,65 @@ export const tenderAPI = {
     return response.data;
   },
 
-  // Get all tenders (placeholder for future implementation)
-  getAll: async () => {
-    const response = await api.get('/tenders');
+  // Autocomplete titles, issuing authorities and locations
+  suggest: async (q: string, limit = 10) => {
+    const response = await api.get('/tenders/suggest', { params: { q, limit } });
+    return response.data;
+  },
+
+  // Get one page of tenders (newest first); pass next_cursor to continue
+  getPage: async (params?: { limit?: number; cursor?: string }) => {
+    const response = await api.get('/tenders', { params });
     return response.data;
   },
 
-  // Get tender by ID (placeholder for future implementation)
+  // Get all tenders by following the list cursor page by page
+  getAll: async () => {
+    const tenders: any[] = [];
+    let cursor: string | undefined;
+    do {
+      const page = await tenderAPI.getPage({ limit: 500, cursor });
+      tenders.push(...(page.tenders || []));
+      cursor = page.next_cursor || undefined;
+    } while (cursor);
+    return { tenders };
+  },
+
+  // Get tender by ID
   getById: async (id: string) => {
     const response = await api.get(`/tenders/${id}`);
     return response.data;
   },
 
-  // Create new tender (placeholder for future implementation)
+  // Create new tender
   create: async (tenderData: any) => {
     const response = await api.post('/tenders', tenderData);
     return response.data;
   },
 
-  // Update tender (placeholder for future implementation)
+  // Update tender
   update: async (id: string, tenderData: any) => {
     const response = await api.put(`/tenders/${id}`, tenderData);
     return response.data;
   },
 
-  // Delete tender (placeholder for future implementation)
+  // Delete tender
   delete: async (id: string) => {
     const response = await api.delete(`/tenders/${id}`);
     return response.data;
   },
+
+  // Bulk import an NDJSON or CSV tender feed
+  import: async (formData: FormData, format?: 'ndjson' | 'csv') => {
+    const response = await api.post('/tenders/import', formData, {
+      params: format ? { format } : undefined,
+      headers: {
+        'Content-Type': 'multipart/form-data',
+      },
+      timeout: 300000,
+    });
+    return response.data;
+  },
 };
 
 // Document API endpoints
@@ -106,24 +136,111 @@ export const documentAPI = {
     }
   },
 
-  // Get all documents from uploads folder
-  getAll: async () => {
-    const response = await api.get('/documents/list');
+  // Upload many files for one tender in a single request
+  uploadBatch: async (formData: FormData) => {
+    const response = await api.post('/documents/upload/batch', formData, {
+      headers: {
+        'Content-Type': 'multipart/form-data',
+      },
+      timeout: 300000, // Batches of large bid documents take a while
+    });
+    return response.data;
+  },
+
+  // Upload a large file in chunks; a dropped connection resumes from the last stored chunk
+  uploadResumable: async (
+    file: File,
+    tenderId: string,
+    documentType: string,
+    onProgress?: (received: number, total: number) => void,
+    chunkSize: number = 8 * 1024 * 1024,
+    maxRetries: number = 5,
+  ) => {
+    const session = (await api.post('/documents/uploads', {
+      tender_id: tenderId,
+      document_type: documentType,
+      filename: file.name,
+      file_size: file.size,
+      content_type: file.type || 'application/pdf',
+    })).data;
+    let received: number = session.received;
+    let retries = 0;
+    while (received < file.size) {
+      try {
+        const chunk = file.slice(received, received + chunkSize);
+        const response = await api.put(`/documents/uploads/${session.session_id}`, chunk, {
+          params: { offset: received },
+          headers: { 'Content-Type': 'application/octet-stream' },
+          timeout: 120000,
+        });
+        received = response.data.received;
+        retries = 0;
+        onProgress?.(received, file.size);
+      } catch (error: any) {
+        if (error.response?.status && error.response.status < 500 && error.response.status !== 409) {
+          throw error;
+        }
+        if (++retries > maxRetries) {
+          throw error;
+        }
+        // Ask the server how much it actually stored before sending more
+        await new Promise((resolve) => setTimeout(resolve, 1000 * retries));
+        received = (await api.get(`/documents/uploads/${session.session_id}`)).data.received;
+      }
+    }
+    const response = await api.post(`/documents/uploads/${session.session_id}/complete`, null, {
+      timeout: 120000,
+    });
+    return response.data;
+  },
+
+  // Get one page of documents (newest first); pass next_cursor to continue
+  getPage: async (params?: {
+    limit?: number;
+    cursor?: string;
+    tender_id?: string;
+    document_type?: string;
+  }) => {
+    const response = await api.get('/documents/list', { params });
     return response.data;
   },
 
-  // Get document by ID (placeholder for future implementation)
+  // Get all documents by following the list cursor page by page
+  getAll: async () => {
+    const documents: any[] = [];
+    let cursor: string | undefined;
+    do {
+      const page = await documentAPI.getPage({ limit: 500, cursor });
+      documents.push(...(page.documents || []));
+      cursor = page.next_cursor || undefined;
+    } while (cursor);
+    return { documents };
+  },
+
+  // Get document by ID
   getById: async (id: string) => {
     const response = await api.get(`/documents/${id}`);
     return response.data;
   },
 
-  // Delete document (placeholder for future implementation)
+  // Delete document
   delete: async (id: string) => {
     const response = await api.delete(`/documents/${id}`);
     return response.data;
   },
 
+  // Download selected documents as one server-built ZIP (also records download history)
+  downloadBundle: async (zipName: string, fileIds: string[]) => {
+    const response = await api.post('/documents/bundle', {
+      zip_name: zipName,
+      file_ids: fileIds,
+    }, {
+      responseType: 'blob',
+      timeout: 0, // Large bundles stream for as long as they need
+    });
+    return response.data as Blob;
+  },
+
   // Download history endpoints
   addDownloadHistory: async (downloadData: {
     zip_name: string;